@@ -0,0 +1,234 @@
+import hashlib
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db.models import F
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from .caching import collection_version, fragment_timeout, get_versions, version_key
+from .models import Category, Comment, Game, Platform, Review, Tag
+from .pagination import paginate_keyset
+
+API_PAGE_SIZE = 50
+
+
+class Resource:
+    """
+    What the JSON API exposes of a model: its fields (API name -> ORM path),
+    the ones returned when the request has no ?fields=, and the keyset
+    ordering of its lists, which must end in the pk.
+    """
+
+    def __init__(self, fields, default_fields, ordering):
+        self.fields = fields
+        self.default_fields = default_fields
+        self.ordering = ordering
+
+    def requested_fields(self, request):
+        """
+        The field names asked for with ?fields=a,b, raising ValueError on unknown ones.
+        """
+        if 'fields' not in request.GET:
+            return list(self.default_fields)
+        names = list(dict.fromkeys(name.strip() for name in request.GET['fields'].split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise ValueError(f"Unknown fields: {', '.join(unknown) or '(none)'}. "
+                             f"Available: {', '.join(self.fields)}.")
+        return names
+
+    def values(self, queryset, names):
+        """
+        A .values() queryset of the named fields, plus the ordering keys paging
+        needs; rows come back as dicts, no model instances are built.
+        """
+        plain = [self.fields[name] for name in names if self.fields[name] == name]
+        renamed = {name: F(self.fields[name]) for name in names if self.fields[name] != name}
+        keys = [field.lstrip('-') for field in self.ordering if field.lstrip('-') not in plain]
+        return queryset.values(*plain, *keys, **renamed)
+
+
+GAMES = Resource(
+    fields={
+        'id': 'id',
+        'title': 'title',
+        'description': 'description',
+        'developer': 'developer',
+        'publisher': 'publisher',
+        'release_date': 'release_date',
+        'age_rating': 'age_rating',
+        'genre': 'genre',
+        'steam_app_id': 'steam_app_id',
+        'parent_game_id': 'parent_game_id',
+        'average_rating': 'rating_avg',
+        'rating_count': 'rating_count',
+    },
+    default_fields=('id', 'title', 'release_date', 'genre', 'average_rating'),
+    ordering=('-id',),
+)
+
+REVIEWS = Resource(
+    fields={
+        'id': 'id',
+        'game_id': 'game_id',
+        'title': 'title',
+        'comment': 'comment',
+        'rating': 'rating',
+        'helpful_votes': 'helpful_votes',
+        'created_at': 'created_at',
+        'critic_id': 'user_id',
+        'critic': 'user__username',
+    },
+    default_fields=('id', 'title', 'rating', 'critic', 'helpful_votes', 'created_at'),
+    ordering=('-created_at', '-id'),
+)
+
+COMMENTS = Resource(
+    fields={
+        'id': 'id',
+        'game_id': 'game_id',
+        'parent_id': 'parent_id',
+        'comment': 'comment',
+        'created': 'created',
+        'edited': 'edited',
+        'like_count': 'like_count',
+        'user_id': 'user_id',
+        'username': 'user__username',
+    },
+    default_fields=('id', 'parent_id', 'comment', 'username', 'like_count', 'created'),
+    ordering=('-created', '-id'),
+)
+
+TAGS = Resource({'id': 'id', 'name': 'tag_name'}, ('id', 'name'), ('id',))
+CATEGORIES = Resource({'id': 'id', 'name': 'category_name'}, ('id', 'name'), ('id',))
+PLATFORMS = Resource({'id': 'id', 'name': 'platform_name'}, ('id', 'name'), ('id',))
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={'separators': (',', ':')})
+
+
+def api_error(message, status=400):
+    return api_response({'error': message}, status=status)
+
+
+def page_response(request, resource, queryset):
+    """
+    One keyset page of the queryset as {'results': [...], 'next': url or null}.
+    """
+    try:
+        names = resource.requested_fields(request)
+        page = paginate_keyset(resource.values(queryset, names), resource.ordering,
+                               request.GET.get('cursor'), API_PAGE_SIZE)
+    except ValueError as e:
+        return api_error(str(e))
+
+    next_url = None
+    if page.has_next:
+        query = request.GET.copy()
+        query['cursor'] = page.next_cursor
+        next_url = f'{request.path}?{query.urlencode()}'
+    return api_response({
+        'results': [{name: row[name] for name in names} for row in page],
+        'next': next_url,
+    })
+
+
+# Conditional GETs. A response's ETag hashes the URL with the cache versions of
+# the data behind it, which the signals bump on every change, so a poll that
+# matches is answered 304 after one cache read, before any query runs.
+
+def api_etag(request, versions):
+    if not hasattr(request, '_api_etag'):
+        key = f"{request.get_full_path()}:{':'.join(map(str, versions()))}"
+        request._api_etag = hashlib.md5(key.encode()).hexdigest()
+    return request._api_etag
+
+
+def api_last_modified(request, versions):
+    """
+    When the response last changed: the time its current ETag was first served.
+    Kept per URL and moved forward at least a second per change, since
+    If-Modified-Since only has one-second resolution.
+    """
+    etag = api_etag(request, versions)
+    key = 'api:modified:' + hashlib.md5(request.get_full_path().encode()).hexdigest()
+    stored = cache.get(key)
+    if stored and stored[0] == etag:
+        modified = stored[1]
+    else:
+        now = int(datetime.now(timezone.utc).timestamp())
+        modified = max(now, stored[1] + 1) if stored else now
+        cache.set(key, (etag, modified), fragment_timeout())
+    return datetime.fromtimestamp(modified, timezone.utc)
+
+
+def conditional(versions):
+    """
+    Decorates an API view with ETag/Last-Modified handling. `versions(**kwargs)`
+    returns the cache versions of what the view reads.
+    """
+    return condition(
+        etag_func=lambda request, **kwargs: api_etag(request, lambda: versions(**kwargs)),
+        last_modified_func=lambda request, **kwargs: api_last_modified(request, lambda: versions(**kwargs)),
+    )
+
+
+def game_scope_versions(game_id, *scopes):
+    keys = [version_key(game_id, scope) for scope in scopes]
+    versions = get_versions(keys)
+    return [versions[key] for key in keys]
+
+
+@require_safe
+@conditional(lambda: [collection_version('game')])
+def games(request):
+    return page_response(request, GAMES, Game.objects.all())
+
+
+@require_safe
+@conditional(lambda game_id: game_scope_versions(game_id, 'card'))
+def game(request, game_id):
+    try:
+        names = GAMES.requested_fields(request)
+    except ValueError as e:
+        return api_error(str(e))
+    row = GAMES.values(Game.objects.filter(id=game_id), names).first()
+    if row is None:
+        return api_error("Game not found.", status=404)
+    return api_response({name: row[name] for name in names})
+
+
+@require_safe
+@conditional(lambda game_id: game_scope_versions(game_id, 'reviews', 'votes'))
+def game_reviews(request, game_id):
+    if not Game.objects.filter(id=game_id).exists():
+        return api_error("Game not found.", status=404)
+    return page_response(request, REVIEWS, Review.objects.filter(game_id=game_id).exclude(status='hidden'))
+
+
+@require_safe
+@conditional(lambda game_id: game_scope_versions(game_id, 'comments'))
+def game_comments(request, game_id):
+    if not Game.objects.filter(id=game_id).exists():
+        return api_error("Game not found.", status=404)
+    return page_response(request, COMMENTS, Comment.objects.filter(game_id=game_id).exclude(status='hidden'))
+
+
+@require_safe
+@conditional(lambda: [collection_version('tag')])
+def tags(request):
+    return page_response(request, TAGS, Tag.objects.all())
+
+
+@require_safe
+@conditional(lambda: [collection_version('category')])
+def categories(request):
+    return page_response(request, CATEGORIES, Category.objects.all())
+
+
+@require_safe
+@conditional(lambda: [collection_version('platform')])
+def platforms(request):
+    return page_response(request, PLATFORMS, Platform.objects.all())
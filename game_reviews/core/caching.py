@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Parts of a game's pages that are cached and invalidated independently;
+# 'votes' changes with the helpful votes and reports on its reviews
+GAME_CACHE_SCOPES = ('card', 'reviews', 'votes', 'comments')
+
+
+class CacheStats:
+    """
+    Per-process hit/miss counters for the fragment cache, by fragment name.
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._lock = threading.Lock()
+
+    def record(self, name, hit):
+        with self._lock:
+            self._counts[name]['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = {name: dict(counts) for name, counts in self._counts.items()}
+        for counts in stats.values():
+            total = counts['hits'] + counts['misses']
+            counts['hit_ratio'] = round(counts['hits'] / total, 3) if total else 0
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60)
+
+
+def version_key(game_id, scope):
+    return f"game:{game_id}:{scope}:version"
+
+
+def critic_version_key(user_id):
+    return f"critic:{user_id}:stats:version"
+
+
+def collection_version_key(name):
+    return f"collection:{name}:version"
+
+
+def new_version():
+    # A fresh, time-based value, so an evicted version can't reuse an old number
+    return int(time.time() * 1000)
+
+
+def get_versions(keys):
+    """
+    Returns {key: version}, reading all versions in one cache round-trip and
+    initializing the missing ones.
+    """
+    versions = cache.get_many(keys)
+
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+
+    return versions
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), None)
+
+
+def game_versions(game_ids, scope):
+    """
+    Returns {game_id: version} for the scope.
+    """
+    keys = {version_key(game_id, scope): game_id for game_id in game_ids}
+    versions = get_versions(keys)
+    return {game_id: versions[key] for key, game_id in keys.items()}
+
+
+def game_version(game_id, scope):
+    return game_versions([game_id], scope)[game_id]
+
+
+def attach_versions(games, scope):
+    """
+    Sets `<scope>_version` on each game, for use in {% fragmentcache %} keys.
+    """
+    games = list(games)
+    versions = game_versions([game.id for game in games], scope)
+    for game in games:
+        setattr(game, f'{scope}_version', versions[game.id])
+    return games
+
+
+def bump_game_version(game_id, *scopes):
+    """
+    Invalidates every cached fragment of the game in the given scopes (all by default).
+    """
+    bump_game_versions([game_id], *scopes)
+
+
+def bump_game_versions(game_ids, *scopes):
+    """
+    bump_game_version for many games, for writes that bypass the signals.
+    """
+    game_ids = list(game_ids)
+    scopes = scopes or GAME_CACHE_SCOPES
+    for game_id in game_ids:
+        for scope in scopes:
+            bump_version(version_key(game_id, scope))
+    if game_ids and 'card' in scopes:
+        # The games' entries in the game list changed with their cards
+        bump_collection_version('game')
+
+
+def collection_version(name):
+    key = collection_version_key(name)
+    return get_versions([key])[key]
+
+
+def bump_collection_version(name):
+    """
+    Invalidates whatever is cached over a whole collection ('game', 'tag', ...), named after its model.
+    """
+    bump_version(collection_version_key(name))
+
+
+def critic_stats_version(user_id):
+    key = critic_version_key(user_id)
+    return get_versions([key])[key]
+
+
+def bump_critic_stats_version(user_id):
+    """
+    Invalidates the cached dashboard stats of the critic.
+    """
+    bump_version(critic_version_key(user_id))
+
+
+def fragment_key(name, *vary_on):
+    return "fragment:" + ":".join([name, *map(str, vary_on)])
+
+
+def get_or_set_fragment(name, vary_on, build, timeout=None):
+    """
+    Returns the cached value for (name, *vary_on), building and storing it on a miss
+    for `timeout` seconds (FRAGMENT_CACHE_TIMEOUT by default).
+    """
+    key = fragment_key(name, *vary_on)
+    value = cache.get(key)
+    cache_stats.record(name, hit=value is not None)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout or fragment_timeout())
+    return value
@@ -0,0 +1,260 @@
+import csv
+import json
+from datetime import date
+
+from django.db import transaction
+
+from .caching import bump_collection_version, bump_game_versions
+from .families import rebuild_family_paths
+from .models import Category, Game, GameCategory, GamePlatform, GameTag, Platform, Tag
+from .search import refresh_facet_counts, update_search_vectors
+
+# Plain columns of a catalogue record, in export order
+GAME_FIELDS = ['title', 'description', 'developer', 'publisher', 'release_date', 'age_rating', 'genre',
+               'steam_app_id']
+# DLCs point at their base game by Steam app id, so links survive across databases
+PARENT_FIELD = 'parent_steam_app_id'
+# Record key: (through model, name model, name field)
+NAME_FIELDS = {
+    'tags': (GameTag, Tag, 'tag_name'),
+    'categories': (GameCategory, Category, 'category_name'),
+    'platforms': (GamePlatform, Platform, 'platform_name'),
+}
+COLUMNS = GAME_FIELDS + [PARENT_FIELD] + list(NAME_FIELDS)
+# Separator of the name lists in CSV cells
+CSV_LIST_SEPARATOR = '|'
+
+
+class InvalidLine:
+    """
+    A JSONL line that isn't valid JSON, reported by parse_record like a record
+    that fails validation.
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+
+def read_records(stream, fmt):
+    """
+    Yields (line number, record dict) from a JSONL or CSV stream, one line at a time.
+    """
+    if fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as error:
+                yield line_number, InvalidLine(error)
+        return
+
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def parse_record(record):
+    """
+    Validates a raw record and returns (Game, parent app id, {key: [names]}). Name
+    lists may also be given as '|'-separated strings, as in CSV.
+    Raises ValueError with a readable message on bad input.
+    """
+    if isinstance(record, InvalidLine):
+        raise ValueError(f"invalid JSON ({record.error})")
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    title = (record.get('title') or '').strip()
+    if not title:
+        raise ValueError("title is required")
+    try:
+        release_date = date.fromisoformat(str(record.get('release_date') or ''))
+    except ValueError:
+        raise ValueError(f"invalid release_date {record.get('release_date')!r}")
+
+    def optional_int(name):
+        value = record.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid {name} {value!r}")
+
+    game = Game(
+        title=title[:255],
+        description=record.get('description') or '',
+        developer=(record.get('developer') or '')[:255],
+        publisher=(record.get('publisher') or '')[:255],
+        release_date=release_date,
+        age_rating=optional_int('age_rating') or 0,
+        genre=record.get('genre') or 'empty',
+        steam_app_id=optional_int('steam_app_id'),
+    )
+    names = {}
+    for key in NAME_FIELDS:
+        value = record.get(key) or []
+        if isinstance(value, str):
+            value = value.split(CSV_LIST_SEPARATOR)
+        names[key] = list(dict.fromkeys(name.strip() for name in value if name and name.strip()))
+    return game, optional_int(PARENT_FIELD), names
+
+
+class CatalogueImporter:
+    """
+    Loads catalogue records with batched bulk_create: games, then their tag,
+    category and platform rows. Names and parent links are resolved from
+    in-memory maps; a DLC listed before its base game is linked once every
+    game exists. Games whose Steam app id is
+    already known are skipped, so an import can be re-run.
+    """
+
+    def __init__(self, batch_size=2000):
+        self.batch_size = batch_size
+        self.name_ids = {}
+        for key, (_, model, field) in NAME_FIELDS.items():
+            ids = {}
+            # Names aren't unique in the schema; the oldest row wins, like a get()-by-name would
+            for pk, name in model.objects.order_by('-pk').values_list('pk', field).iterator():
+                ids[name] = pk
+            self.name_ids[key] = ids
+        self.app_ids = dict(
+            Game.objects.exclude(steam_app_id__isnull=True).values_list('steam_app_id', 'pk').iterator()
+        )
+        self.pending_parents = []  # (game id, parent app id)
+        self.created = self.skipped = self.linked = 0
+        self.errors = []
+
+    def run(self, records):
+        batch = []
+        for line_number, record in records:
+            try:
+                game, parent_app_id, names = parse_record(record)
+            except (ValueError, AttributeError) as error:
+                self.errors.append(f"line {line_number}: {error}")
+                continue
+            if game.steam_app_id is not None and game.steam_app_id in self.app_ids:
+                self.skipped += 1
+                continue
+            if game.steam_app_id is not None:
+                self.app_ids[game.steam_app_id] = None  # reserved until the batch is written
+            batch.append((game, parent_app_id, names))
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+
+        self.link_parents()
+        # bulk_create and bulk_update skip the signals that maintain family paths
+        rebuild_family_paths()
+        refresh_facet_counts()
+
+    def resolve_names(self, key, names):
+        _, model, field = NAME_FIELDS[key]
+        ids = self.name_ids[key]
+        missing = [name for name in names if name not in ids]
+        if missing:
+            created = model.objects.bulk_create([model(**{field: name}) for name in missing])
+            ids.update((getattr(obj, field), obj.pk) for obj in created)
+            # bulk_create skips the signals that invalidate the cached lists (and API ETags)
+            bump_collection_version(model._meta.model_name)
+
+    @transaction.atomic
+    def write_batch(self, batch):
+        for key in NAME_FIELDS:
+            self.resolve_names(key, dict.fromkeys(name for _, _, names in batch for name in names[key]))
+
+        for game, parent_app_id, _ in batch:
+            # Usually the base game is already written; link it at insert time
+            game.parent_game_id = self.app_ids.get(parent_app_id)
+        games = Game.objects.bulk_create([game for game, _, _ in batch])
+        for game, parent_app_id, _ in batch:
+            if game.steam_app_id is not None:
+                self.app_ids[game.steam_app_id] = game.pk
+            if game.parent_game_id is not None:
+                self.linked += 1
+            elif parent_app_id is not None:
+                self.pending_parents.append((game.pk, parent_app_id))
+
+        for key, (through, model, field) in NAME_FIELDS.items():
+            related = model._meta.model_name + '_id'
+            ids = self.name_ids[key]
+            through.objects.bulk_create(
+                [through(game_id=game.pk, **{related: ids[name]}) for game, _, names in batch for name in names[key]],
+                batch_size=self.batch_size,
+            )
+
+        # bulk_create skips the post_save signals that fill in the search document
+        # and invalidate the cached game list
+        update_search_vectors([game.pk for game in games])
+        bump_collection_version('game')
+        self.created += len(games)
+
+    def link_parents(self):
+        links = [
+            Game(pk=game_id, parent_game_id=self.app_ids[parent_app_id])
+            for game_id, parent_app_id in self.pending_parents
+            if self.app_ids.get(parent_app_id) not in (None, game_id)
+        ]
+        for parent_app_id in {app_id for _, app_id in self.pending_parents if self.app_ids.get(app_id) is None}:
+            self.errors.append(f"unknown {PARENT_FIELD} {parent_app_id}")
+        Game.objects.bulk_update(links, ['parent_game'], batch_size=self.batch_size)
+        bump_game_versions([game.pk for game in links], 'card')
+        self.linked += len(links)
+
+
+def iter_export_records(batch_size=2000):
+    """
+    Yields every game as a catalogue record, in id order. Games are streamed
+    with .iterator() and their names fetched per batch, so memory stays flat.
+    """
+    rows = Game.objects.order_by('pk').values('pk', *GAME_FIELDS, 'parent_game__steam_app_id')
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield from export_batch(batch)
+            batch = []
+    if batch:
+        yield from export_batch(batch)
+
+
+def export_batch(rows):
+    game_ids = [row['pk'] for row in rows]
+    names = {row['pk']: {key: [] for key in NAME_FIELDS} for row in rows}
+    for key, (through, model, field) in NAME_FIELDS.items():
+        related = model._meta.model_name
+        pairs = (
+            through.objects.filter(game_id__in=game_ids)
+            .order_by('pk').values_list('game_id', f'{related}__{field}')
+        )
+        for game_id, name in pairs:
+            names[game_id][key].append(name)
+
+    for row in rows:
+        record = {field: row[field] for field in GAME_FIELDS}
+        record['release_date'] = row['release_date'].isoformat()
+        record[PARENT_FIELD] = row['parent_game__steam_app_id']
+        record.update(names[row['pk']])
+        yield record
+
+
+def write_records(stream, records, fmt):
+    """
+    Writes records to a JSONL or CSV stream as they come; returns how many were written.
+    """
+    count = 0
+    if fmt == 'jsonl':
+        for count, record in enumerate(records, start=1):
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return count
+
+    writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+    writer.writeheader()
+    for count, record in enumerate(records, start=1):
+        row = dict(record)
+        for key in NAME_FIELDS:
+            row[key] = CSV_LIST_SEPARATOR.join(row[key])
+        writer.writerow(row)
+    return count
@@ -0,0 +1,126 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.db.models.expressions import RawSQL
+
+from .caching import game_version, get_or_set_fragment
+from .models import Comment, Like
+from .pagination import KeysetPage, paginate_keyset
+
+COMMENT_THREADS_PER_PAGE = 20
+
+
+def thread_ids_sql(roots):
+    """
+    Recursive CTE selecting the ids of the given comments (a list of ids or a
+    Comment queryset) and all their replies, at any depth. Usable as the
+    right-hand side of an `id__in` filter.
+    """
+    table = connection.ops.quote_name(Comment._meta.db_table)
+    if isinstance(roots, QuerySet):
+        roots_sql, params = roots.order_by().values('id').query.sql_with_params()
+    else:
+        roots_sql, params = ', '.join(['%s'] * len(roots)), tuple(roots)
+    sql = (
+        f"WITH RECURSIVE thread(id) AS ("
+        f"SELECT id FROM {table} WHERE id IN ({roots_sql}) "
+        f"UNION ALL "
+        f"SELECT c.id FROM {table} c JOIN thread t ON c.parent_id = t.id"
+        f") SELECT id FROM thread"
+    )
+    return RawSQL(sql, params)
+
+
+def liked_comment_ids(user, comment_ids):
+    """
+    Returns the subset of `comment_ids` the user has liked, in a single query.
+    """
+    if not user.is_authenticated or not comment_ids:
+        return set()
+    return set(
+        Like.objects.filter(user=user, comment_id__in=comment_ids).values_list('comment_id', flat=True)
+    )
+
+
+def toggle_like(user, comment):
+    """
+    Likes the comment, or removes the like if the user already liked it.
+    Returns True if the comment is liked afterwards. The unique constraint on
+    (user, comment) settles double-submits racing each other.
+    """
+    with transaction.atomic():
+        # Locked first so a racing unlike finds it gone instead of decrementing the count again
+        like = Like.objects.select_for_update().filter(user=user, comment=comment).first()
+        if like is not None:
+            like.delete()
+            return False
+
+    try:
+        with transaction.atomic():
+            Like.objects.create(user=user, comment=comment)
+    except IntegrityError:
+        pass  # a concurrent request liked it first
+    return True
+
+
+def build_comment_tree(game, cursor, page_size):
+    """
+    Loads one page of top-level comment threads with every reply at any depth, in
+    two queries: one for the page of thread roots and one for the threads
+    themselves (with users). Returns (root comments, next cursor); each comment has
+    a `children` list of its replies in posting order. Hidden comments are left
+    out along with their replies.
+    """
+    roots = paginate_keyset(
+        Comment.objects.filter(game=game, parent__isnull=True).exclude(status='hidden').values('id', 'created'),
+        ('-created', '-id'),
+        cursor,
+        page_size,
+    )
+    root_ids = [row['id'] for row in roots]
+    if not root_ids:
+        return [], None
+
+    comments = (
+        Comment.objects.filter(id__in=thread_ids_sql(root_ids))
+        .exclude(status='hidden')
+        .select_related('user')
+        .order_by('created', 'id')
+    )
+
+    by_id = {}
+    for comment in comments:
+        comment.children = []
+        by_id[comment.id] = comment
+
+    for comment in by_id.values():
+        if comment.parent_id is not None and comment.parent_id in by_id:
+            by_id[comment.parent_id].children.append(comment)
+
+    return [by_id[root_id] for root_id in root_ids if root_id in by_id], roots.next_cursor
+
+
+def walk_comments(comments):
+    for comment in comments:
+        yield comment
+        yield from walk_comments(comment.children)
+
+
+def load_comment_tree(game, cursor=None, page_size=COMMENT_THREADS_PER_PAGE, user=None):
+    """
+    Returns a KeysetPage of a game's comment threads (see build_comment_tree).
+    The tree is shared by all users through the fragment cache, keyed by the
+    game's 'comments' version; only the `liked` flags for `user` are looked up
+    per request, in one query.
+    """
+    roots, next_cursor = get_or_set_fragment(
+        'comment_tree',
+        [game.id, game_version(game.id, 'comments'), cursor or '', page_size],
+        lambda: build_comment_tree(game, cursor, page_size),
+    )
+
+    comments = list(walk_comments(roots))
+    liked = liked_comment_ids(user, [comment.id for comment in comments]) if user is not None else set()
+    for comment in comments:
+        comment.liked = comment.id in liked
+
+    return KeysetPage(roots, next_cursor)
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db.models import Avg, Count, F, Q, Sum, Value, Window
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .caching import critic_stats_version, get_or_set_fragment
+from .models import Game, Review, ReviewVote
+from .pagination import paginate_keyset
+
+CRITIC_REVIEWS_PAGE_SIZE = 20
+
+MOST_COMMENTED_GAMES = 5
+
+
+def critic_summary(user):
+    """
+    Review count, rating distribution, helpful votes received and the critic's
+    average rating next to the average of the games they reviewed, in one
+    aggregate query over the critic's reviews.
+    """
+    histogram = {f'rating_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)}
+    summary = Review.objects.filter(user=user).aggregate(
+        review_count=Count('id'),
+        average_rating=Avg('rating'),
+        games_average=Avg('game__rating_avg'),
+        helpful_votes=Coalesce(Sum('helpful_votes'), Value(0)),
+        **histogram,
+    )
+
+    total = summary['review_count']
+    summary['distribution'] = [
+        {
+            'stars': stars,
+            'count': summary[f'rating_{stars}'],
+            'percent': round(100 * summary[f'rating_{stars}'] / total) if total else 0,
+        }
+        for stars in range(5, 0, -1)
+    ]
+    if total:
+        summary['difference'] = summary['average_rating'] - summary['games_average']
+    return summary
+
+
+def helpful_votes_by_month(user):
+    """
+    Helpful votes on the critic's reviews per month, with the running total, in
+    one window query: [{'month': date, 'votes': n, 'total': n}, ...] oldest first.
+    """
+    month = TruncMonth('created_at')
+    return list(
+        ReviewVote.objects.filter(review__user=user, kind='helpful')
+        .annotate(
+            month=month,
+            votes=Window(Count('id'), partition_by=month),
+            # The default frame ends at the current month's last row: a running total
+            total=Window(Count('id'), order_by=month.asc()),
+        )
+        .values('month', 'votes', 'total')
+        .distinct()
+        .order_by('month')
+    )
+
+
+def most_commented_games(user, limit=MOST_COMMENTED_GAMES):
+    """
+    The games the critic reviewed that get the most (visible) comments, in one grouped query.
+    """
+    return list(
+        Game.objects.filter(reviews__user=user)
+        .annotate(comment_count=Count('comment', filter=~Q(comment__status='hidden')))
+        .order_by('-comment_count', '-id')
+        .only('id', 'title')[:limit]
+    )
+
+
+def critic_stats(user):
+    """
+    The dashboard stats of a critic: {'summary', 'votes_by_month', 'most_commented'}.
+    They read every review of the critic, so they're cached, keyed by a version
+    bumped when the critic's reviews change. New votes and comments on them
+    show up after CRITIC_STATS_TIMEOUT seconds.
+    """
+    return get_or_set_fragment(
+        'critic_stats',
+        [user.id, critic_stats_version(user.id)],
+        lambda: {
+            'summary': critic_summary(user),
+            'votes_by_month': helpful_votes_by_month(user),
+            'most_commented': most_commented_games(user),
+        },
+        timeout=getattr(settings, 'CRITIC_STATS_TIMEOUT', 5 * 60),
+    )
+
+
+def critic_reviews(user, cursor=None, page_size=CRITIC_REVIEWS_PAGE_SIZE):
+    """
+    A KeysetPage of the critic's reviews, newest first, each with its game and
+    `rating_difference` from the game's average rating.
+    """
+    return paginate_keyset(
+        Review.objects.filter(user=user)
+        .select_related('game')
+        .only('title', 'comment', 'rating', 'helpful_votes', 'created_at', 'game__title', 'game__rating_avg')
+        .annotate(rating_difference=F('rating') - F('game__rating_avg')),
+        ('-created_at', '-id'),
+        cursor,
+        page_size,
+    )
@@ -0,0 +1,154 @@
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import CharField, Exists, OuterRef, Q, Subquery, Sum, Value, Window
+from django.db.models.functions import Cast, Concat, LPad, Length, Substr
+
+from .models import Game
+from .pagination import paginate_keyset
+
+# Each game adds its zero-padded id and a slash to its parent's family_path
+PATH_DIGITS = 10
+PATH_STEP = PATH_DIGITS + 1
+
+FRANCHISE_PAGE_SIZE = 10
+
+# The columns family listings show
+FAMILY_FIELDS = ('id', 'title', 'release_date', 'parent_game_id', 'family_path', 'rating_avg', 'rating_count')
+
+
+def path_segment(game_id):
+    return f'{game_id:0{PATH_DIGITS}d}/'
+
+
+def family_key(family_path):
+    # The base game's segment, shared by the whole family
+    return family_path[:PATH_STEP]
+
+
+class Family:
+    """
+    A base game with all its DLCs, in tree order, and the family-wide rating:
+    the aggregate of every member's stored ratings.
+    """
+
+    def __init__(self, members, rating_sum=0, rating_count=0):
+        self.members = members
+        self.rating_count = rating_count or 0
+        self.rating_avg = (rating_sum or 0) / self.rating_count if self.rating_count else 0
+
+    @property
+    def base(self):
+        return self.members[0]
+
+    @property
+    def dlcs(self):
+        return self.members[1:]
+
+    @property
+    def average_rating(self):
+        return round(self.rating_avg, 2)
+
+
+def family_members(queryset, partition_by=None):
+    """
+    The games of the queryset in tree order, each annotated with
+    family_rating_sum/count over its family (or over the whole queryset).
+    """
+    window = {'partition_by': partition_by} if partition_by is not None else {}
+    return list(
+        queryset.only(*FAMILY_FIELDS)
+        .annotate(
+            depth=Length('family_path') / PATH_STEP - 1,
+            family_rating_sum=Window(Sum('rating_sum'), **window),
+            family_rating_count=Window(Sum('rating_count'), **window),
+        )
+        .order_by('family_path')
+    )
+
+
+def load_family(game):
+    """
+    The Family of a game, base game and DLCs included, in one indexed prefix query.
+    """
+    if not game.family_path:
+        # Not placed yet (rebuild_families hasn't run since it was imported)
+        return Family([game], game.rating_sum, game.rating_count)
+    members = family_members(Game.objects.filter(family_path__startswith=family_key(game.family_path)))
+    return Family(members, members[0].family_rating_sum, members[0].family_rating_count)
+
+
+def franchise_page(cursor=None, page_size=FRANCHISE_PAGE_SIZE):
+    """
+    A KeysetPage of the families that have DLCs, newest base game first, each
+    item a Family. Two queries: the page of base games, then all their members
+    with per-family rating aggregates.
+    """
+    bases = paginate_keyset(
+        Game.objects.filter(parent_game__isnull=True)
+        .exclude(family_path='')
+        .filter(Exists(Game.objects.filter(parent_game=OuterRef('pk'))))
+        .only('id', 'family_path'),
+        ('-id',),
+        cursor,
+        page_size,
+    )
+    if not bases.items:
+        return bases
+
+    members = family_members(
+        Game.objects.filter(reduce(or_, [Q(family_path__startswith=base.family_path) for base in bases])),
+        partition_by=Substr('family_path', 1, PATH_STEP),
+    )
+    by_family = {}
+    for member in members:
+        by_family.setdefault(family_key(member.family_path), []).append(member)
+    bases.items = [
+        Family(family, family[0].family_rating_sum, family[0].family_rating_count)
+        for family in (by_family[base.family_path] for base in bases)
+    ]
+    return bases
+
+
+def own_segment():
+    return Concat(LPad(Cast('id', CharField()), PATH_DIGITS, Value('0')), Value('/'), output_field=CharField())
+
+
+def rebuild_family_paths():
+    """
+    Recomputes every game's family_path from parent_game, one set-based UPDATE
+    per level of the hierarchy. Games caught in a parent cycle belong to no
+    family and keep their previous path. Returns the number of games placed.
+    """
+    with transaction.atomic():
+        level = Game.objects.filter(parent_game__isnull=True)
+        placed = updated = level.update(family_path=own_segment())
+        parent_path = Game.objects.filter(pk=OuterRef('parent_game_id')).values('family_path')
+        while updated:
+            level = Game.objects.filter(parent_game__in=level.values('id'))
+            updated = level.update(family_path=Concat(Subquery(parent_path), own_segment(), output_field=CharField()))
+            placed += updated
+    return placed
+
+
+def stored_family_paths(game):
+    """
+    (the game's stored family_path, its parent's) in one query, '' when missing.
+    """
+    ids = [pk for pk in (game.pk, game.parent_game_id) if pk is not None]
+    paths = dict(Game.objects.filter(pk__in=ids).values_list('pk', 'family_path')) if ids else {}
+    return paths.get(game.pk, ''), paths.get(game.parent_game_id, '')
+
+
+def move_subtree(old_path, new_path):
+    """
+    Moves the game stored at old_path and its descendants under new_path in one
+    UPDATE; the game's own row too, since a save(update_fields=['parent_game'])
+    doesn't write its family_path. An empty new_path (the game was deleted)
+    makes the top of each remaining subtree a base game.
+    """
+    if old_path and old_path != new_path:
+        Game.objects.filter(family_path__startswith=old_path).update(
+            family_path=Concat(Value(new_path), Substr('family_path', len(old_path) + 1), output_field=CharField())
+        )
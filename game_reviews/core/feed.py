@@ -0,0 +1,142 @@
+import heapq
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+
+from .models import Comment, Event, FeedEntry, Follow
+from .pagination import KeysetPage, decode_cursor, encode_cursor
+
+FEED_PAGE_SIZE = 20
+
+
+def fanout_limit():
+    return getattr(settings, 'FEED_FANOUT_LIMIT', 1000)
+
+
+def follow_source(game=None, critic=None):
+    return {'game': game} if game is not None else {'critic': critic}
+
+
+def is_following(user, game=None, critic=None):
+    if not user.is_authenticated:
+        return False
+    return Follow.objects.filter(user=user, **follow_source(game, critic)).exists()
+
+
+def toggle_follow(user, game=None, critic=None):
+    """
+    Follows the game or critic, or unfollows it if the user already does.
+    Returns True if the user follows it afterwards.
+
+    A follow that takes the source to FEED_FANOUT_LIMIT followers marks all its
+    follows `pull`: from then on its events are no longer copied into each
+    follower's feed but read at feed time. A source stays popular once it is,
+    since turning back would lose the events published while it was pulled.
+    """
+    source = follow_source(game, critic)
+    deleted, _ = Follow.objects.filter(user=user, **source).delete()
+    if deleted:
+        return False
+
+    follows = Follow.objects.filter(**source)
+    pull = follows.filter(pull=True).exists()
+    # Counting stops at the limit, so following a popular source costs the same as a small one
+    if not pull and follows[:fanout_limit()].count() >= fanout_limit() - 1:
+        follows.update(pull=True)
+        pull = True
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=user, pull=pull, **source)
+    except IntegrityError:
+        pass  # followed by a concurrent request
+    return True
+
+
+def deliver(event, user_ids):
+    FeedEntry.objects.bulk_create([FeedEntry(user_id=user_id, event=event) for user_id in user_ids], batch_size=1000)
+
+
+def publish_review(review):
+    """
+    Logs a new review and copies it into the feeds of the followers of its game
+    and critic, except those of popular sources, who read it at feed time.
+    """
+    event = Event.objects.create(kind='review', actor_id=review.user_id, game_id=review.game_id, review=review)
+    followers = set(
+        Follow.objects.filter(Q(game_id=review.game_id) | Q(critic_id=review.user_id), pull=False)
+        .values_list('user_id', flat=True)
+    )
+    followers.discard(review.user_id)
+    deliver(event, followers)
+    return event
+
+
+def publish_reply(comment):
+    """
+    Logs a reply and notifies the author of the comment replied to.
+    """
+    parent_author = Comment.objects.filter(pk=comment.parent_id).values_list('user_id', flat=True).first()
+    if parent_author is None or parent_author == comment.user_id:
+        return None
+    event = Event.objects.create(kind='reply', actor_id=comment.user_id, game_id=comment.game_id, comment=comment)
+    deliver(event, [parent_author])
+    return event
+
+
+def pulled_event_ids(user, before, limit):
+    """
+    The newest review events of the popular games and critics the user follows,
+    newest first. Each source is its own range scan of the partial (game, -id)
+    or (actor, -id) index, stopped after `limit` rows; an OR of the sources
+    would read every matching event and sort them all. The scans run as one
+    UNION ALL where the database allows limits in compound queries.
+    """
+    sources = list(Follow.objects.filter(user=user, pull=True).values_list('game_id', 'critic_id'))
+    scans = []
+    for game_id, critic_id in sources:
+        source = {'game_id': game_id} if game_id is not None else {'actor_id': critic_id}
+        events = Event.objects.filter(kind='review', **source)
+        if before is not None:
+            events = events.filter(id__lt=before)
+        scans.append(events.order_by('-id').values_list('id', flat=True)[:limit])
+    if not scans:
+        return []
+
+    if len(scans) > 1 and connections[scans[0].db].features.supports_slicing_ordering_in_compound:
+        ids = scans[0].union(*scans[1:], all=True)
+    else:
+        ids = [event_id for scan in scans for event_id in scan]
+    # A critic's review of a followed game comes from both scans
+    return heapq.nlargest(limit, set(ids))
+
+
+def load_feed(user, cursor=None, page_size=FEED_PAGE_SIZE):
+    """
+    A KeysetPage of the user's feed, newest event first. Events are paged by id:
+    the copied ones are one range scan of the user's (user, event) index, merged
+    with the events of the few popular sources they follow. Events whose review
+    or comment has since been deleted or hidden are left out of the page.
+    """
+    before = decode_cursor(cursor, 1)[0] if cursor else None
+
+    entries = FeedEntry.objects.filter(user=user)
+    if before is not None:
+        entries = entries.filter(event_id__lt=before)
+    ids = set(entries.order_by('-event_id').values_list('event_id', flat=True)[:page_size + 1])
+    # A source that became popular has its older events in both
+    ids.update(pulled_event_ids(user, before, page_size + 1))
+    ids = sorted(ids, reverse=True)
+
+    next_cursor = encode_cursor([ids[page_size - 1]]) if len(ids) > page_size else None
+    events = (
+        Event.objects.filter(id__in=ids[:page_size])
+        .select_related('actor', 'game', 'review', 'comment')
+        .only(
+            'kind', 'created_at', 'actor__username', 'game__title',
+            'review__title', 'review__rating', 'review__status', 'comment__comment', 'comment__status',
+        )
+        .order_by('-id')
+    ) if ids else []
+    items = [event for event in events if event.target is not None and event.target.status != 'hidden']
+    return KeysetPage(items, next_cursor)
@@ -2,8 +2,6 @@ import os
 from datetime import datetime
 
 from django import forms
-from google.cloud import storage
-from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.utils.text import slugify
 
@@ -36,54 +34,47 @@ class CustomAuthenticationForm(AuthenticationForm):
 
 
 class GameForm(forms.ModelForm):
-
-    def upload_file(self, file, content_type, blob_name):  # Added content_type parameter
-        try:
-            storage_client = storage.Client.from_service_account_json(os.environ['GOOGLE_CREDENTIALS_PATH'])
-            bucket = storage_client.get_bucket(os.environ['GS_BUCKET_NAME'])
-            blob = bucket.blob(blob_name)
-
-            content = file.read()
-
-            blob.upload_from_string(
-                content,
-                content_type=content_type
-            )
-
-            blob.make_public()
-            return blob.public_url
-
-        except Exception as e:
-            print (f"Error uploading file: {str(e)}")
-            raise
-
-    def gen_filename(self, filename):
+    # Allowed extensions per upload field; None accepts any file
+    ALLOWED_EXTENSIONS = {
+        'image': ['.jpg', '.jpeg', '.png', '.gif', '.webp'],
+        'video': ['.mp4', '.webm', '.mov', '.mkv'],
+        'file': None,
+    }
+
+    def gen_filename(self, filename, field='image'):
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        ext = os.path.splitext(filename)[1].lower ()  # Convert extension to lowercase
+        ext = os.path.splitext(filename)[1].lower()  # Convert extension to lowercase
 
         # Validate extension
-        ALLOWED_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-        if ext not in ALLOWED_EXTENSIONS:
-            raise ValueError("Invalid file extension")
+        allowed = self.ALLOWED_EXTENSIONS[field]
+        if allowed is not None and ext not in allowed:
+            raise forms.ValidationError("Invalid file extension")
 
         return f"{timestamp}{ext}"
 
-    def save(self, commit=True):
-        instance = super().save(commit=False)
-        print(f"Saving instance with image: {instance.image}")
-        # Debug
-        if self.cleaned_data.get('image'):
-            image_file = self.cleaned_data['image']
-            dest_blob = f"{settings.GS_LOCATION}/games/images/{self.gen_filename(image_file.name)}"
-            public_url = self.upload_file(image_file.file, image_file.content_type, dest_blob)
-            instance.image = public_url
-
-        if commit:
-            instance.save()
-        return instance
-
-
-
+    def clean_upload(self, field):
+        # Files are not uploaded here: the model's FileFields stream them to the
+        # default storage on save, in GS_BLOB_CHUNK_SIZE chunks from Django's temp file
+        upload = self.cleaned_data.get(field)
+        if upload and self.add_prefix(field) in self.files:
+            upload.name = self.gen_filename(upload.name, field)
+        return upload
+
+    def clean_image(self):
+        return self.clean_upload('image')
+
+    def clean_video(self):
+        return self.clean_upload('video')
+
+    def clean_file(self):
+        return self.clean_upload('file')
+
+    def clean_parent_game(self):
+        parent = self.cleaned_data.get('parent_game')
+        path = self.instance.family_path
+        if parent and self.instance.pk and path and parent.family_path.startswith(path):
+            raise forms.ValidationError("A game can't be a DLC of itself or of one of its DLCs.")
+        return parent
 
     class Meta:
         model = Game
@@ -0,0 +1,40 @@
+import base64
+import io
+
+from PIL import Image, ImageOps
+
+# Kept free of Django imports: the spawned image workers import this module on its own
+
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+PLACEHOLDER_WIDTH = 16
+
+
+def render_variants(data, widths):
+    """
+    Pure Pillow work, run in the process pool: decodes the image once and returns
+    ({format: {width: bytes}}, placeholder data URI). Widths above the original are
+    skipped, so images are never upscaled.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+
+    targets = [width for width in widths if width < image.width] or [image.width]
+    variants = {name: {} for name in VARIANT_FORMATS}
+    for width in targets:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        for name, options in VARIANT_FORMATS.items():
+            out = io.BytesIO()
+            resized.save(out, **options)
+            variants[name][width] = out.getvalue()
+
+    # A tiny blurred preview, inlined into the page while the real image loads
+    thumb = image.resize((PLACEHOLDER_WIDTH, max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))))
+    out = io.BytesIO()
+    thumb.save(out, format='JPEG', quality=40)
+    placeholder = 'data:image/jpeg;base64,' + base64.b64encode(out.getvalue()).decode()
+
+    return variants, placeholder
@@ -0,0 +1,85 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core.models import Comment, CustomUser, Game, GameTag, Review
+from core.seed import seed_dataset
+
+# Planner switches turned off for the "before" run, approximating the tables without their indexes
+NO_INDEX_SETTINGS = ('enable_indexscan', 'enable_indexonlyscan', 'enable_bitmapscan')
+
+
+class Command(BaseCommand):
+    help = (
+        "Optionally seeds a large dataset, then reports the query plan and timing of every hot "
+        "query path with index scans disabled (before) and enabled (after). PostgreSQL only; "
+        "run it against a development or benchmark database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-games', type=int, default=0,
+                            help="Seed this many games (with reviews, comments and likes) first.")
+        parser.add_argument('--runs', type=int, default=20,
+                            help="Executions per query used for the timing.")
+        parser.add_argument('--plans', action='store_true',
+                            help="Print the full EXPLAIN ANALYZE output, not just the top node.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("bench_indexes needs PostgreSQL (it relies on EXPLAIN ANALYZE and planner settings).")
+
+        if options['seed_games']:
+            counts = seed_dataset(games=options['seed_games'])
+            self.stdout.write("Seeded " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        game = Game.objects.annotate(n=Count('reviews')).order_by('-n').first()
+        critic = CustomUser.objects.filter(role='critic').annotate(n=Count('review')).order_by('-n').first()
+        if game is None or critic is None:
+            raise CommandError("No data to benchmark; use --seed-games.")
+
+        queries = {
+            'latest reviews of a game': Review.objects.filter(game=game).order_by('-created_at')[:10],
+            'critic dashboard reviews': Review.objects.filter(user=critic).order_by('-created_at')[:25],
+            'has critic reviewed game': Review.objects.filter(game=game, user=critic),
+            'top-level comment threads': (
+                Comment.objects.filter(game=game, parent__isnull=True).order_by('-created', '-id')[:20]
+            ),
+            'DLCs of a game': Game.objects.filter(parent_game=game),
+            'tags of a game': GameTag.objects.filter(game=game),
+        }
+
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, indexed in (('before', False), ('after', True)):
+                plan, timings = self.measure(queryset, indexed, options['runs'])
+                plan_text = plan if options['plans'] else plan.splitlines()[0]
+                self.stdout.write(
+                    f"  {label:<6} median {statistics.median(timings):8.3f} ms  "
+                    f"p95 {self.percentile(timings, 95):8.3f} ms  {plan_text}"
+                )
+
+    @staticmethod
+    def measure(queryset, indexed, runs):
+        with transaction.atomic():
+            if not indexed:
+                with connection.cursor() as cursor:
+                    for setting in NO_INDEX_SETTINGS:
+                        cursor.execute(f"SET LOCAL {setting} = off")
+
+            plan = queryset.explain(analyze=True)
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+        return plan, timings
+
+    @staticmethod
+    def percentile(values, percent):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
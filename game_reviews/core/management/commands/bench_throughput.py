@@ -0,0 +1,77 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests a running server: at each concurrency level, that many clients request "
+        "the given paths round-robin over keep-alive connections for --duration seconds. "
+        "Reports throughput and latency percentiles, e.g. to compare runserver with gunicorn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the server.")
+        parser.add_argument('--paths', nargs='+', default=['/', '/games/', '/search/?q=dragon'])
+        parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+        parser.add_argument('--duration', type=float, default=10, help="Seconds per concurrency level.")
+
+    def handle(self, *args, **options):
+        base_url = options['url'].rstrip('/')
+        try:
+            requests.get(base_url + options['paths'][0], timeout=10)
+        except requests.RequestException as error:
+            raise CommandError(f"{base_url} is not reachable: {error}")
+
+        self.stdout.write(f"{'clients':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+        for clients in options['concurrency']:
+            latencies, errors, elapsed = self.run_level(base_url, options['paths'], clients, options['duration'])
+            if not latencies:
+                self.stdout.write(f"{clients:>7} {'-':>8} {'-':>8} {'-':>8} {'-':>8} {errors:>7}")
+                continue
+            self.stdout.write(
+                f"{clients:>7} {len(latencies) / elapsed:>8.1f} {statistics.median(latencies):>6.1f}ms "
+                f"{percentile(latencies, 95):>6.1f}ms {percentile(latencies, 99):>6.1f}ms {errors:>7}"
+            )
+
+    @staticmethod
+    def run_level(base_url, paths, clients, duration):
+        latencies, errors = [], 0
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client(offset):
+            nonlocal errors
+            timings, failed = [], 0
+            with requests.Session() as session:
+                index = offset
+                while time.perf_counter() < deadline:
+                    url = base_url + paths[index % len(paths)]
+                    index += 1
+                    start = time.perf_counter()
+                    try:
+                        response = session.get(url, timeout=30)
+                        ok = response.status_code < 500
+                    except requests.RequestException:
+                        ok = False
+                    if ok:
+                        timings.append((time.perf_counter() - start) * 1000)
+                    else:
+                        failed += 1
+            with lock:
+                latencies.extend(timings)
+                errors += failed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(client, range(clients)))
+        return latencies, errors, time.perf_counter() - start
@@ -0,0 +1,73 @@
+import multiprocessing
+import resource
+import tempfile
+import time
+
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management.base import BaseCommand
+
+MB = 1024 * 1024
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_upload(mode, storage, size_mb, results):
+    upload = TemporaryUploadedFile('bench.mp4', 'video/mp4', size_mb * MB, None)
+    # Sparse file: the size is real for the upload, but nothing is written to disk up front
+    upload.file.truncate(size_mb * MB)
+    upload.seek(0)
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'buffered':
+        # The previous GameForm.upload_file behaviour: read the whole file, then upload it
+        name = storage.save('bench/buffered.mp4', ContentFile(upload.read()))
+    else:
+        # Wrapped so FileSystemStorage copies it chunk by chunk like the GCS backend
+        # does, instead of just renaming Django's temp file into place
+        name = storage.save('bench/streamed.mp4', File(upload.file, name=upload.name))
+    elapsed = time.perf_counter() - start
+
+    upload.close()
+    storage.delete(name)
+    results.put((mode, elapsed, baseline, peak_rss_mb()))
+
+
+class Command(BaseCommand):
+    help = (
+        "Uploads a large synthetic video through the storage backend and reports the peak "
+        "RSS of streaming it versus reading it into memory first. Each mode runs in its own "
+        "process so the peaks don't mask each other."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=2048, help="Upload size in MB.")
+        parser.add_argument('--storage', choices=['local', 'default'], default='local',
+                            help="'local' writes to a temporary directory, 'default' uses DEFAULT_FILE_STORAGE.")
+        parser.add_argument('--modes', nargs='+', choices=['streamed', 'buffered'],
+                            default=['streamed', 'buffered'])
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as location:
+            storage = FileSystemStorage(location=location) if options['storage'] == 'local' else default_storage
+            context = multiprocessing.get_context('fork')
+            results = context.Queue()
+
+            for mode in options['modes']:
+                process = context.Process(target=run_upload, args=(mode, storage, options['size'], results))
+                process.start()
+                process.join()
+                if process.exitcode != 0:
+                    self.stderr.write(f"{mode}: upload process failed (exit code {process.exitcode})")
+                    continue
+
+                mode, elapsed, baseline, peak = results.get()
+                self.stdout.write(
+                    f"{mode:<9} {options['size']} MB in {elapsed:6.2f} s  "
+                    f"peak RSS {peak:8.1f} MB (+{peak - baseline:.1f} MB over baseline)"
+                )
@@ -0,0 +1,218 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, reset_queries, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, reverse
+
+from core import urls as core_urls
+from core.models import Comment, CustomUser, Game, Review, SteamStats
+from core.seed import seed_dataset
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'benchmarks' / 'views_baseline.json'
+
+# How each URL in core/urls.py is exercised: (role of the logged-in user or None, method, query string),
+# optionally followed by POST data, formatted with the fixture ids
+SCENARIOS = {
+    'home': (None, 'get', ''),
+    'register': (None, 'get', ''),
+    'login': (None, 'get', ''),
+    'logout': ('user', 'get', ''),
+    'account_details': ('user', 'get', ''),
+    'game_detail': ('user', 'get', ''),
+    'game_list': (None, 'get', ''),
+    'franchise_list': (None, 'get', ''),
+    'search': (None, 'get', 'q=dragon'),
+    'create_game': ('admin', 'get', ''),
+    'edit_game': ('admin', 'get', ''),
+    'delete_game': ('admin', 'get', ''),
+    'delete_comment': ('moderator', 'get', ''),
+    'like_comment': ('user', 'post', ''),
+    'moderation_queue': ('moderator', 'get', ''),
+    # Everything the fixture user posted, replies and likes included
+    'bulk_moderate_comments': ('moderator', 'post', '', {'action': 'delete', 'user': '{user_id}'}),
+    'bulk_moderate_reviews': ('moderator', 'post', '', {'action': 'hide', 'ids': '{review_id}'}),
+    'edit_critic': ('critic', 'get', ''),
+    'delete_critic': ('critic', 'get', ''),
+    'delete_critic_confirm': ('critic', 'get', ''),
+    'verify_critic': ('critic', 'get', ''),
+    'critic_dashboard': ('critic', 'get', ''),
+    'all_reviews': (None, 'get', ''),
+    'create_review': ('critic', 'get', ''),
+    'vote_review_helpful': ('user', 'post', ''),
+    'report_review': ('user', 'post', ''),
+    'follow_game': ('user', 'post', ''),
+    'follow_critic': ('user', 'post', ''),
+    'feed': ('user', 'get', ''),
+    'user_list': ('admin', 'get', ''),
+    'update_user_role': ('admin', 'get', ''),
+    'cache_stats': ('admin', 'get', ''),
+    'metrics': ('admin', 'get', ''),
+    'api_games': (None, 'get', ''),
+    'api_game': (None, 'get', 'fields=id,title,description,average_rating'),
+    'api_game_reviews': (None, 'get', ''),
+    'api_game_comments': (None, 'get', ''),
+    'api_tags': (None, 'get', ''),
+    'api_categories': (None, 'get', ''),
+    'api_platforms': (None, 'get', ''),
+    'upload_file': (None, 'get', ''),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway test database, requests every URL of core/urls.py through the test "
+        "client and reports latency percentiles and SQL query counts per view. Fails when a "
+        "view runs more queries than the committed baseline, e.g. after an N+1 regression. "
+        "Runs on SQLite (DB_ENGINE=sqlite) or a local PostgreSQL, without outside services."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=300, help="Number of games to seed.")
+        parser.add_argument('--runs', type=int, default=20,
+                            help="Warm requests per view used for the latency percentiles.")
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                            help="Baseline file to check against (or write with --update-baseline).")
+        parser.add_argument('--update-baseline', action='store_true',
+                            help="Record this run as the baseline of the current database vendor.")
+        parser.add_argument('--max-slowdown', type=float,
+                            help="Also fail when a view's warm p95 exceeds the baseline's by this factor.")
+
+    def handle(self, *args, **options):
+        missing = [p.name for p in core_urls.urlpatterns if isinstance(p, URLPattern) and p.name not in SCENARIOS]
+        if missing:
+            raise CommandError(f"No benchmark scenario for: {', '.join(missing)}")
+
+        setup_test_environment()
+        # The app ships without migrations; create the tables straight from the models
+        connection.settings_dict['TEST']['MIGRATE'] = False
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            seed_dataset(games=options['games'], critics=20, users=100, seed=1)
+            results = self.run_scenarios(self.fixtures(), options['runs'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results)
+
+        baseline_path = Path(options['baseline'])
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        if options['update_baseline']:
+            baseline[connection.vendor] = {'games': options['games'], 'views': results}
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote the {connection.vendor} baseline to {baseline_path}."))
+            return
+
+        if connection.vendor not in baseline:
+            raise CommandError(f"{baseline_path} has no {connection.vendor} baseline; run with --update-baseline.")
+        failures = self.compare(results, baseline[connection.vendor]['views'], options['max_slowdown'])
+        if failures:
+            raise CommandError("Benchmark regressions:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Every view is within its baseline."))
+
+    @staticmethod
+    def fixtures():
+        """
+        Picks the objects the URLs point at and the users they're requested as.
+        """
+        game = Game.objects.filter(children__isnull=False).order_by('pk').first()
+        # game_detail falls back to SteamSpy without a stored snapshot; keep the run offline
+        SteamStats.objects.create(game=game, positive_reviews=900, negative_reviews=100, score=90)
+        critic = CustomUser.objects.filter(role='critic').annotate(n=Count('review')).order_by('-n', 'pk').first()
+        users = {
+            'user': CustomUser.objects.filter(role='user').order_by('pk').first(),
+            'critic': critic,
+            'admin': CustomUser.objects.create(username='bench-admin', email='bench-admin@example.com', role='admin'),
+            'moderator': CustomUser.objects.create(username='bench-moderator', email='bench-moderator@example.com',
+                                                   role='moderator'),
+        }
+        kwargs = {
+            'game_id': game.pk,
+            'user_id': users['user'].pk,
+            'critic_id': critic.pk,
+            'comment_id': Comment.objects.filter(game=game).order_by('pk').values_list('pk', flat=True).first(),
+            'review_id': Review.objects.filter(game=game).order_by('pk').values_list('pk', flat=True).first(),
+        }
+        return users, kwargs
+
+    def run_scenarios(self, fixtures, runs):
+        users, kwargs = fixtures
+        client = Client()
+        results = {}
+
+        for pattern in core_urls.urlpatterns:
+            role, method, query, *data = SCENARIOS[pattern.name]
+            data = {key: value.format(**kwargs) for key, value in data[0].items()} if data else None
+            url = reverse(pattern.name, kwargs={name: kwargs[name] for name in pattern.pattern.converters})
+            if query:
+                url = f'{url}?{query}'
+
+            timings, queries, status = [], [], None
+            cache.clear()  # the first request runs cold, without cached fragments
+            for _ in range(runs + 1):
+                client.logout()
+                if role:
+                    client.force_login(users[role])
+                reset_queries()  # CaptureQueriesContext stops counting once the query log is full
+                # Each request is rolled back, so deletes and likes don't change what the next one sees
+                with transaction.atomic(), CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = getattr(client, method)(url, data)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    transaction.set_rollback(True)
+                queries.append(len(captured))
+                status = response.status_code
+
+            warm = timings[1:]
+            results[pattern.name] = {
+                'status': status,
+                'queries_cold': queries[0],
+                'queries_warm': max(queries[1:]),
+                'cold_ms': round(timings[0], 2),
+                'p50_ms': round(statistics.median(warm), 2),
+                'p95_ms': round(self.percentile(warm, 95), 2),
+                'p99_ms': round(self.percentile(warm, 99), 2),
+            }
+        return results
+
+    def report(self, results):
+        self.stdout.write(f"{'view':<24} {'status':>6} {'queries':>9} {'cold':>9} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24} {result['status']:>6} {result['queries_cold']:>4}/{result['queries_warm']:<4} "
+                f"{result['cold_ms']:>7.1f}ms {result['p50_ms']:>6.1f}ms {result['p95_ms']:>6.1f}ms "
+                f"{result['p99_ms']:>6.1f}ms"
+            )
+
+    @staticmethod
+    def compare(results, baseline, max_slowdown):
+        failures = []
+        for name, result in results.items():
+            if result['status'] >= 500:
+                failures.append(f"{name}: status {result['status']}")
+            expected = baseline.get(name)
+            if expected is None:
+                failures.append(f"{name}: not in the baseline")
+                continue
+            for key in ('queries_cold', 'queries_warm'):
+                if result[key] > expected[key]:
+                    failures.append(f"{name}: {result[key]} {key.replace('_', ' ')} (baseline {expected[key]})")
+            if max_slowdown and result['p95_ms'] > expected['p95_ms'] * max_slowdown:
+                failures.append(f"{name}: p95 {result['p95_ms']} ms (baseline {expected['p95_ms']} ms)")
+        return failures
+
+    @staticmethod
+    def percentile(values, percent):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
@@ -0,0 +1,117 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.models import CustomUser, Game, Review, ReviewVote
+from core.reviews import report_review, toggle_helpful_vote
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency check for review votes: in a throwaway test database, --threads threads "
+        "(two per user, so double-submits race too) toggle helpful votes on and report the same "
+        "review. Fails unless the review's counters match its vote rows afterwards. Reports vote "
+        "throughput and latency. Needs PostgreSQL; SQLite serializes writers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--votes', type=int, default=200, help="Helpful vote toggles per thread.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("bench_votes needs concurrent writers; run it against PostgreSQL.")
+
+        setup_test_environment()
+        # The app ships without migrations; create the tables straight from the models
+        connection.settings_dict['TEST']['MIGRATE'] = False
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            review = self.create_review()
+            users = CustomUser.objects.bulk_create([
+                CustomUser(username=f'voter-{index}', email=f'voter-{index}@example.com')
+                for index in range(max(1, options['threads'] // 2))
+            ])
+            latencies, errors, elapsed = self.hammer(review, users, options['threads'], options['votes'])
+            counts = Review.objects.filter(pk=review.pk).values('helpful_votes', 'report_count').get()
+            rows = {
+                'helpful_votes': ReviewVote.objects.filter(review=review, kind='helpful').count(),
+                'report_count': ReviewVote.objects.filter(review=review, kind='report').count(),
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{len(latencies)} votes by {options['threads']} threads in {elapsed:.2f}s: "
+            f"{len(latencies) / elapsed:.0f} votes/s, p50 {statistics.median(latencies):.1f}ms, "
+            f"p99 {self.percentile(latencies, 99):.1f}ms, {errors} errors"
+        )
+        mismatches = [
+            f"{field} is {counts[field]} but there are {rows[field]} vote rows"
+            for field in rows if counts[field] != rows[field]
+        ]
+        if errors:
+            mismatches.append(f"{errors} votes failed")
+        if rows['report_count'] != len(users):
+            mismatches.append(f"{rows['report_count']} reports by {len(users)} users")
+        if mismatches:
+            raise CommandError("Vote counters are inconsistent:\n  " + "\n  ".join(mismatches))
+        self.stdout.write(self.style.SUCCESS(
+            f"Counters match the vote rows: {counts['helpful_votes']} helpful, {counts['report_count']} reports."
+        ))
+
+    @staticmethod
+    def create_review():
+        critic = CustomUser.objects.create(username='bench-critic', email='bench-critic@example.com', role='critic')
+        game = Game.objects.create(
+            title='Viral', description='', developer='', publisher='',
+            release_date=date(2024, 1, 1), age_rating=12,
+        )
+        return Review.objects.create(game=game, user=critic, rating=5, title='Viral review', comment='')
+
+    @staticmethod
+    def hammer(review, users, threads, votes):
+        latencies, errors = [], 0
+        lock = threading.Lock()
+        start_line = threading.Barrier(threads)
+
+        def voter(index):
+            nonlocal errors
+            user = users[index % len(users)]
+            timings, failed = [], 0
+            start_line.wait()
+            try:
+                for step in range(votes):
+                    start = time.perf_counter()
+                    try:
+                        # Every tenth vote re-reports, racing on the unique constraint
+                        if step % 10 == 0:
+                            report_review(user, review)
+                        else:
+                            toggle_helpful_vote(user, review)
+                    except Exception:
+                        failed += 1
+                    else:
+                        timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections.close_all()  # this thread's connection, before the test database is dropped
+            with lock:
+                latencies.extend(timings)
+                errors += failed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(voter, range(threads)))
+        return latencies, errors, time.perf_counter() - start
+
+    @staticmethod
+    def percentile(values, percent):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
@@ -0,0 +1,38 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.media import build_image_variants, get_pools
+from core.models import Game
+
+
+class Command(BaseCommand):
+    help = "Builds the resized cover image variants of games that don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Rebuild variants for every game with an image.")
+
+    def handle(self, *args, **options):
+        games = Game.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            games = games.filter(image_variants={})
+
+        process_pool, coordinator = get_pools()
+
+        def build(game_id):
+            try:
+                return build_image_variants(game_id, process_pool)
+            finally:
+                connections.close_all()
+
+        futures = {coordinator.submit(build, game_id): game_id for game_id in games.values_list('id', flat=True)}
+        built = failed = 0
+        for future in as_completed(futures):
+            try:
+                built += future.result()
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Game {futures[future]}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Built image variants for {built} games, {failed} failed."))
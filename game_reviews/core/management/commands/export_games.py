@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.catalogue import iter_export_records, write_records
+
+
+class Command(BaseCommand):
+    help = "Streams the game catalogue to a JSONL or CSV file ('-' for stdout), in the import_games format."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to write, or '-' for stdout.")
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help="Output format; guessed from the file extension by default.")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Number of games fetched per query.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('csv' if options['path'].endswith('.csv') else 'jsonl')
+        records = iter_export_records(batch_size=options['batch_size'])
+
+        if options['path'] == '-':
+            write_records(sys.stdout, records, fmt)
+            return
+
+        with open(options['path'], 'w', newline='', encoding='utf-8') as stream:
+            count = write_records(stream, records, fmt)
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} games to {options['path']}."))
@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.catalogue import CatalogueImporter, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a game catalogue from a JSONL or CSV file ('-' for stdin), in batches of "
+        "bulk inserts. Games whose Steam app id already exists are skipped, and lines that "
+        "aren't valid JSON or fail validation are reported with their line number and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, or '-' for stdin.")
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help="Input format; guessed from the file extension by default.")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Number of games written per batch.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('csv' if options['path'].endswith('.csv') else 'jsonl')
+        importer = CatalogueImporter(batch_size=options['batch_size'])
+
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        try:
+            importer.run(read_records(stream, fmt))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for error in importer.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {importer.created} games ({importer.linked} DLC links), skipped {importer.skipped} "
+            f"existing, {len(importer.errors)} errors."
+        ))
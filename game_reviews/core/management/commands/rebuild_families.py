@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.families import rebuild_family_paths
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the family path of every game from its parent game, e.g. after bulk imports."
+
+    def handle(self, *args, **options):
+        placed = rebuild_family_paths()
+        self.stdout.write(self.style.SUCCESS(f"Placed {placed} games in their families."))
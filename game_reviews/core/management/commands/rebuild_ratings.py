@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the stored rating aggregates of every game from its reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_rating_aggregates(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates, {updated} games changed."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.search import refresh_facet_counts, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the full-text search vectors of every game and the cached facet counts, "
+        "e.g. after writing games with bulk queries that skip the signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--facets-only', action='store_true',
+                            help="Only recompute the facet counts.")
+
+    def handle(self, *args, **options):
+        if not options['facets_only']:
+            updated = update_search_vectors()
+            self.stdout.write(f"Updated search vectors for {updated} games.")
+
+        facets = refresh_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f"Counted {facets} facet values."))
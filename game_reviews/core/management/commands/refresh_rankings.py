@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.rankings import RANKINGS, refresh_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the precomputed ranked lists (top rated, trending, most helpful reviews) "
+        "shown on the home page. Meant to run periodically, e.g. every few minutes from cron. "
+        "Top rated only rescores the games rated since the last refresh; run it with --full "
+        "now and then (e.g. hourly) to rank the whole catalogue against a fresh catalogue mean."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', nargs='+', choices=list(RANKINGS),
+                            help="Only refresh these lists.")
+        parser.add_argument('--full', action='store_true',
+                            help="Rank the whole catalogue again instead of only the games rated since the last refresh.")
+
+    def handle(self, *args, **options):
+        stored = refresh_rankings(options['lists'], full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            "Refreshed " + ", ".join(f"{name} ({count} entries)" for name, count in stored.items())
+        ))
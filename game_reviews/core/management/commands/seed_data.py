@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.seed import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a synthetic catalogue: games with tags, categories and platforms, DLCs, critic "
+        "reviews with helpful votes, threaded comments, likes, follows and activity feeds. "
+        "For development and benchmark databases."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=1000)
+        parser.add_argument('--critics', type=int, default=50)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--reviews-per-game', type=int, default=10)
+        parser.add_argument('--comments-per-game', type=int, default=20)
+        parser.add_argument('--likes-per-comment', type=int, default=2)
+        parser.add_argument('--votes-per-review', type=int, default=3)
+        parser.add_argument('--follows-per-user', type=int, default=6)
+        parser.add_argument('--seed', type=int, help="Random seed, for a reproducible dataset.")
+
+    def handle(self, *args, **options):
+        counts = seed_dataset(
+            games=options['games'],
+            critics=options['critics'],
+            users=options['users'],
+            reviews_per_game=options['reviews_per_game'],
+            comments_per_game=options['comments_per_game'],
+            likes_per_comment=options['likes_per_comment'],
+            votes_per_review=options['votes_per_review'],
+            follows_per_user=options['follows_per_user'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS("Seeded " + ", ".join(f"{count} {name}" for name, count in counts.items())))
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Game, SteamStats
+from core.utils import SteamSpyClient, steamspy
+
+
+class Command(BaseCommand):
+    help = (
+        "Refreshes the stored SteamSpy stats of every game whose snapshot is missing or stale. "
+        "Throughput is capped by the per-host rate limit, not by --workers: at SteamSpy's "
+        "documented 1 request/s (STEAMSPY_RATE_LIMIT), 10,000 apps take about 2.8 hours. "
+        "Workers only overlap the latency of requests within that rate. Pages never call SteamSpy, "
+        "so run it with --missing every few minutes to fetch the stats of newly added games."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8,
+                            help="Maximum number of SteamSpy requests in flight.")
+        parser.add_argument('--rate', type=float,
+                            help="Requests per second for this run, instead of STEAMSPY_RATE_LIMIT "
+                                 "(e.g. against a mirror or with a higher quota); 0 disables the limit.")
+        parser.add_argument('--max-age', type=float, default=24,
+                            help="Refresh snapshots older than this many hours.")
+        parser.add_argument('--all', action='store_true',
+                            help="Refresh every game regardless of snapshot age.")
+        parser.add_argument('--missing', action='store_true',
+                            help="Only fetch the games that have no snapshot yet.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of snapshots written per query.")
+
+    def handle(self, *args, **options):
+        games = Game.objects.exclude(steam_app_id__isnull=True)
+        if options['missing']:
+            games = games.filter(steam_stats__isnull=True)
+        elif not options['all']:
+            cutoff = timezone.now() - timedelta(hours=options['max_age'])
+            games = games.filter(Q(steam_stats__isnull=True) | Q(steam_stats__fetched_at__lt=cutoff))
+
+        # Several games can point at the same Steam app, fetch each app once
+        games_by_app = defaultdict(list)
+        for game_id, app_id in games.values_list('id', 'steam_app_id').iterator():
+            games_by_app[app_id].append(game_id)
+
+        client = steamspy if options['rate'] is None else SteamSpyClient(rate_limit=options['rate'])
+        if client.rate_limiter.interval and games_by_app:
+            minutes = len(games_by_app) * client.rate_limiter.interval / 60
+            self.stdout.write(f"Refreshing {len(games_by_app)} Steam apps at "
+                              f"{1 / client.rate_limiter.interval:g} requests/s, about {minutes:.0f} minutes.")
+
+        refreshed = failed = 0
+        batch = []
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(client.fetch, app_id): app_id for app_id in games_by_app}
+            for future in as_completed(futures):
+                info = future.result()
+                if info is None:
+                    failed += 1
+                    continue
+
+                total = info['total_reviews']
+                for game_id in games_by_app[futures[future]]:
+                    batch.append(SteamStats(
+                        game_id=game_id,
+                        positive_reviews=info['positive_reviews'],
+                        negative_reviews=info['negative_reviews'],
+                        score=info['positive_reviews'] / total * 100 if total else 0,
+                        fetched_at=timezone.now(),
+                    ))
+                refreshed += 1
+
+                if len(batch) >= options['batch_size']:
+                    self.save(batch)
+                    batch = []
+
+        if batch:
+            self.save(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} Steam apps, {failed} failed."))
+
+    @staticmethod
+    def save(batch):
+        SteamStats.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['game'],
+            update_fields=['positive_reviews', 'negative_reviews', 'score', 'fetched_at'],
+        )
@@ -0,0 +1,100 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+from .caching import bump_game_version
+from .imaging import render_variants
+from .models import Game
+
+logger = logging.getLogger(__name__)
+
+
+def variant_widths():
+    return tuple(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 1280)))
+
+
+_process_pool = None
+_coordinator = None
+_pool_lock = threading.Lock()
+
+
+def get_pools():
+    """
+    Lazily starts the process pool doing the Pillow work and a small thread pool
+    that downloads originals and uploads variants around it.
+    """
+    global _process_pool, _coordinator
+    with _pool_lock:
+        if _process_pool is None:
+            workers = getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2)
+            # spawn: workers only run Pillow, so they needn't inherit Django or DB sockets
+            _process_pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+            _coordinator = ThreadPoolExecutor(workers, thread_name_prefix='image-variants')
+    return _process_pool, _coordinator
+
+
+def build_image_variants(game_id, process_pool=None):
+    """
+    Generates and stores the resized variants and placeholder of a game's image.
+    Renders in `process_pool` when given, inline otherwise.
+    """
+    image_name = Game.objects.filter(pk=game_id).values_list('image', flat=True).first()
+    if not image_name:
+        return False
+
+    with default_storage.open(image_name, 'rb') as original:
+        data = original.read()
+
+    if process_pool is None:
+        variants, placeholder = render_variants(data, variant_widths())
+    else:
+        variants, placeholder = process_pool.submit(render_variants, data, variant_widths()).result()
+
+    stem = os.path.splitext(image_name)[0]
+    urls = {}
+    for name, sizes in variants.items():
+        urls[name] = {}
+        for width, content in sizes.items():
+            saved = default_storage.save(f"{stem}_{width}w.{name}", ContentFile(content))
+            urls[name][str(width)] = default_storage.url(saved)
+
+    # Only store the result if the image wasn't replaced meanwhile
+    updated = Game.objects.filter(pk=game_id, image=image_name).update(
+        image_variants=urls, image_placeholder=placeholder,
+    )
+    if updated:
+        bump_game_version(game_id, 'card')
+    return bool(updated)
+
+
+def _build_in_background(game_id):
+    process_pool, _ = get_pools()
+    try:
+        build_image_variants(game_id, process_pool)
+    except Exception:
+        logger.exception("Failed to build image variants for game %s", game_id)
+    finally:
+        connections.close_all()  # this thread's connections only
+
+
+def schedule_image_variants(game_id):
+    """
+    Queues variant generation for after the current transaction commits, off the
+    request path. With IMAGE_PROCESSING_WORKERS = 0 it runs inline (e.g. in tests).
+    """
+    if not getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2):
+        transaction.on_commit(lambda: build_image_variants(game_id))
+        return
+
+    def submit():
+        _, coordinator = get_pools()
+        coordinator.submit(_build_in_background, game_id)
+
+    transaction.on_commit(submit)
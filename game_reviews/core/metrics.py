@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+from .caching import cache_stats
+
+logger = logging.getLogger(__name__)
+
+# Where time is spent within a request, besides the view's own Python code
+COMPONENTS = ('db', 'http', 'template')
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestMetrics:
+    """
+    Time and call counts per component for one request. Shared by the threads
+    and tasks serving the request, hence the lock.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.seconds = dict.fromkeys(COMPONENTS, 0.0)
+        self.calls = dict.fromkeys(COMPONENTS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, component, seconds):
+        with self._lock:
+            self.seconds[component] += seconds
+            self.calls[component] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+# Copied into sync_to_async threads and asyncio tasks, so async views are covered too
+current_request = ContextVar('current_request_metrics', default=None)
+
+
+@contextmanager
+def track(component):
+    """
+    Adds the time spent in the block to the current request's component, if any.
+    """
+    metrics = current_request.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(component, time.perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every database connection (see CoreConfig.ready).
+    """
+    with track('db'):
+        return execute(sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with track('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing every top-level render for RequestMetrics.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class MetricsRegistry:
+    """
+    Per-process request counters and duration histograms by view, rendered in
+    the Prometheus text format. Each worker process is scraped on its own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)  # (view, method, status) -> count
+        self._buckets = defaultdict(lambda: [0] * (len(DURATION_BUCKETS) + 1))  # view -> counts
+        self._duration = defaultdict(float)  # view -> seconds
+        self._component_seconds = defaultdict(float)  # (view, component) -> seconds
+        self._component_calls = defaultdict(int)  # (view, component) -> count
+
+    def observe(self, view, method, status, duration, metrics):
+        with self._lock:
+            self._requests[view, method, status] += 1
+            self._buckets[view][bisect_left(DURATION_BUCKETS, duration)] += 1
+            self._duration[view] += duration
+            for component in COMPONENTS:
+                self._component_seconds[view, component] += metrics.seconds[component]
+                self._component_calls[view, component] += metrics.calls[component]
+
+    def reset(self):
+        with self._lock:
+            for counters in (self._requests, self._buckets, self._duration,
+                             self._component_seconds, self._component_calls):
+                counters.clear()
+
+    def render(self):
+        with self._lock:
+            requests = dict(self._requests)
+            buckets = {view: list(counts) for view, counts in self._buckets.items()}
+            duration = dict(self._duration)
+            component_seconds = dict(self._component_seconds)
+            component_calls = dict(self._component_calls)
+
+        lines = [
+            '# HELP game_reviews_requests_total Requests served, by view, method and status.',
+            '# TYPE game_reviews_requests_total counter',
+        ]
+        for (view, method, status), count in sorted(requests.items()):
+            lines.append(f'game_reviews_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP game_reviews_request_duration_seconds Wall time of requests, by view.',
+            '# TYPE game_reviews_request_duration_seconds histogram',
+        ]
+        for view, counts in sorted(buckets.items()):
+            cumulative = 0
+            for bound, count in zip((*DURATION_BUCKETS, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'game_reviews_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'game_reviews_request_duration_seconds_sum{{view="{view}"}} {duration[view]:.6f}')
+            lines.append(f'game_reviews_request_duration_seconds_count{{view="{view}"}} {cumulative}')
+
+        lines += [
+            '# HELP game_reviews_component_seconds_total Time spent in SQL, outbound HTTP and templates, by view.',
+            '# TYPE game_reviews_component_seconds_total counter',
+        ]
+        for (view, component), seconds in sorted(component_seconds.items()):
+            lines.append(f'game_reviews_component_seconds_total{{view="{view}",component="{component}"}} {seconds:.6f}')
+        lines += [
+            '# HELP game_reviews_component_calls_total SQL queries, outbound HTTP calls and template renders, by view.',
+            '# TYPE game_reviews_component_calls_total counter',
+        ]
+        for (view, component), count in sorted(component_calls.items()):
+            lines.append(f'game_reviews_component_calls_total{{view="{view}",component="{component}"}} {count}')
+
+        lines += [
+            '# HELP game_reviews_fragment_cache_requests_total Fragment cache lookups, by fragment and result.',
+            '# TYPE game_reviews_fragment_cache_requests_total counter',
+        ]
+        for name, counts in sorted(cache_stats.snapshot().items()):
+            for result, key in (('hit', 'hits'), ('miss', 'misses')):
+                lines.append(
+                    f'game_reviews_fragment_cache_requests_total{{fragment="{name}",result="{result}"}} {counts[key]}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def server_timing(metrics, total):
+    parts = [f'total;dur={total * 1000:.1f}']
+    for component in COMPONENTS:
+        if metrics.calls[component]:
+            parts.append(
+                f'{component};dur={metrics.seconds[component] * 1000:.1f};desc="{metrics.calls[component]} calls"'
+            )
+    return ', '.join(parts)
+
+
+class RequestMetricsMiddleware:
+    """
+    Times each request and its SQL, outbound HTTP and template work. Adds a
+    Server-Timing header, feeds the /metrics registry and logs requests slower
+    than SLOW_REQUEST_THRESHOLD (seconds). Should be the first middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = metrics.elapsed()
+        match = request.resolver_match
+        # URL names keep the label set small; unmatched paths share one label
+        view = (match.view_name if match else None) or 'unmatched'
+        registry.observe(view, request.method, response.status_code, total, metrics)
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = server_timing(metrics, total)
+
+        if total >= getattr(settings, 'SLOW_REQUEST_THRESHOLD', 1.0):
+            logger.warning(
+                "Slow request: %s %s (%s) took %.0f ms; db %.0f ms in %d queries, http %.0f ms in %d calls, "
+                "templates %.0f ms",
+                request.method, request.get_full_path(), view, total * 1000,
+                metrics.seconds['db'] * 1000, metrics.calls['db'],
+                metrics.seconds['http'] * 1000, metrics.calls['http'],
+                metrics.seconds['template'] * 1000,
+            )
+        return response
@@ -1,4 +1,6 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
@@ -53,20 +55,100 @@ class Game(models.Model):
     parent_game = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name="children")
     genre = models.TextField(max_length=255, default='empty')
 
+    # Materialized path of the game in its DLC family, the zero-padded ids from the
+    # base game down to this one ('0000000012/0000000045/'); maintained by core.signals
+    # on parent changes and rebuilt in bulk by `manage.py rebuild_families`
+    family_path = models.CharField(max_length=255, blank=True, default='', editable=False)
+
+    # Denormalized rating aggregates, maintained by core.signals on Review changes
+    # and rebuilt in bulk by `manage.py rebuild_ratings`
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    # Set whenever the aggregates change; refresh_rankings rescores only these games and clears it
+    ranking_dirty = models.BooleanField(default=False, editable=False)
+
+    # Resized copies of `image`, {'webp': {'320': url, ...}, 'jpeg': {...}}, and a tiny
+    # inline preview; both generated in the background by core.media
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, default='', editable=False)
+
+    # Full-text document over title/developer/publisher/description, see core.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the game list by release date
+            models.Index(fields=['-release_date', '-id'], name='game_release_date_id_idx'),
+            GinIndex(fields=['search_vector'], name='game_search_vector_idx'),
+            # Prefix (LIKE 'path%') lookups of a whole family or subtree
+            models.Index(fields=['family_path'], name='game_family_path_idx', opclasses=['varchar_pattern_ops']),
+            # The few games whose rating changed since the last ranking refresh
+            models.Index(fields=['id'], name='game_ranking_dirty_idx', condition=models.Q(ranking_dirty=True)),
+        ]
 
     def __str__(self):
         return self.title
 
+    # Average rating read from the stored aggregates, no Review query needed
+    @property
+    def average_rating(self):
+        return round(self.rating_avg, 2)
+
+    def image_srcset(self, variant):
+        sizes = self.image_variants.get(variant, {})
+        return ', '.join(f"{url} {width}w" for width, url in sorted(sizes.items(), key=lambda item: int(item[0])))
+
+    @property
+    def webp_srcset(self):
+        return self.image_srcset('webp')
+
+    @property
+    def jpeg_srcset(self):
+        return self.image_srcset('jpeg')
+
+    # Smallest JPEG variant, for browsers that ignore srcset
+    @property
+    def image_fallback_url(self):
+        sizes = self.image_variants.get('jpeg', {})
+        if not sizes:
+            return self.image.url if self.image else ''
+        return sizes[min(sizes, key=int)]
+
+    # Number of reviews per star, e.g. {1: 0, 2: 3, 3: 10, 4: 7, 5: 2}
+    @property
+    def rating_histogram(self):
+        return {stars: getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
+
+
+# Steam stats snapshot, refreshed off the request path by `manage.py steam_refresh`
+class SteamStats(models.Model):
+    game = models.OneToOneField(Game, on_delete=models.CASCADE, related_name='steam_stats')
+    positive_reviews = models.PositiveIntegerField(default=0)
+    negative_reviews = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0)  # percentage of positive reviews
+    fetched_at = models.DateTimeField(default=timezone.now)
+
     def __str__(self):
-        return self.title
+        return f"Steam stats for {self.game.title}"
 
-    # Property to calculate the average rating for the game
     @property
-    def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return sum(review.rating for review in reviews) / reviews.count()
-        return 0
+    def total_reviews(self):
+        return self.positive_reviews + self.negative_reviews
+
+
+# Moderation state of user content. Hidden content is left out of every listing
+# (and hidden reviews out of the rating aggregates), see core.moderation
+MODERATION_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('approved', 'Approved'),
+    ('hidden', 'Hidden'),
+]
 
 
 # Comment model
@@ -75,8 +157,20 @@ class Comment(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     edited = models.BooleanField(default=False)
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, db_index=False)  # covered by comment_game_thread_idx
     parent = models.ForeignKey('self', null=True, blank=True, related_name='replies', on_delete=models.CASCADE)
+    like_count = models.PositiveIntegerField(default=0)  # maintained by core.signals on Like changes
+    status = models.CharField(max_length=10, choices=MODERATION_STATUS_CHOICES, default='pending')
+
+    class Meta:
+        indexes = [
+            # Paging a game's top-level threads (parent IS NULL) newest first
+            models.Index(fields=['game', 'parent', '-created', '-id'], name='comment_game_thread_idx'),
+            # Recent comments across all games (trending rankings)
+            models.Index(fields=['created'], name='comment_created_idx'),
+            # Moderation queue: comments awaiting review, newest first
+            models.Index(fields=['status', '-created', '-id'], name='comment_status_created_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.game.title}"
@@ -84,9 +178,14 @@ class Comment(models.Model):
 
 # Like model
 class Like(models.Model):
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)  # covered by unique_comment_like
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'comment'], name='unique_comment_like'),
+        ]
+
 
 # Review model
 class Review(models.Model):
@@ -94,15 +193,131 @@ class Review(models.Model):
     title = models.CharField(max_length=255)
     helpful_votes = models.IntegerField(null=True, blank=True, default=0)
     report_count = models.IntegerField(default=0)
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='reviews')
+    # Both FKs are covered by the composite indexes below
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='reviews', db_index=False)
     rating = models.IntegerField(choices=[(i, i) for i in range(1, 6)])
     created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=MODERATION_STATUS_CHOICES, default='pending')
+
+    class Meta:
+        indexes = [
+            # Latest reviews of a game (game_detail, all_reviews)
+            models.Index(fields=['game', '-created_at'], name='review_game_created_idx'),
+            # A critic's reviews, newest first (critic_dashboard)
+            models.Index(fields=['user', '-created_at'], name='review_user_created_idx'),
+            # Recent reviews across all games and the most helpful ones (rankings)
+            models.Index(fields=['created_at'], name='review_created_idx'),
+            models.Index(fields=['-helpful_votes', '-id'], name='review_helpful_idx'),
+            # Moderation queue: most reported first; only the few reported reviews are indexed
+            models.Index(fields=['-report_count', '-id'], name='review_reported_idx',
+                         condition=models.Q(report_count__gt=0)),
+        ]
+        constraints = [
+            # One review per critic per game; also serves the has-reviewed lookup
+            models.UniqueConstraint(fields=['game', 'user'], name='unique_game_review'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+# Helpful votes and reports on reviews, one of each per user per review.
+# Review.helpful_votes and report_count are maintained by core.signals on changes
+class ReviewVote(models.Model):
+    KIND_CHOICES = [
+        ('helpful', 'Helpful'),
+        ('report', 'Report'),
+    ]
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)  # covered by unique_review_vote
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='votes')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'review', 'kind'], name='unique_review_vote'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} vote by {self.user_id} on review {self.review_id}"
+
+
+# A user following a game or a critic; exactly one of the two is set.
+# `pull` is set on every follow of a popular source (see core.feed): its events
+# are read at feed time instead of being copied into each follower's feed
+class Follow(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)  # covered by the unique constraints
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, null=True, blank=True, related_name='followers')
+    critic = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='followers')
+    pull = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The popular sources a user follows, read with every feed page
+            models.Index(fields=['user'], name='follow_pull_idx', condition=models.Q(pull=True)),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'game'], name='unique_game_follow'),
+            models.UniqueConstraint(fields=['user', 'critic'], name='unique_critic_follow'),
+            models.CheckConstraint(
+                check=models.Q(game__isnull=False, critic__isnull=True) | models.Q(game__isnull=True, critic__isnull=False),
+                name='follow_one_source',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} follows {f'game {self.game_id}' if self.game_id else f'critic {self.critic_id}'}"
+
+
+# Append-only activity log. Events are never updated, and they outlive the review
+# or comment they point to (moderation deletes those in bulk), so those two
+# references carry no database constraint; core.feed skips events whose target is gone
+class Event(models.Model):
+    KIND_CHOICES = [
+        ('review', 'New review'),
+        ('reply', 'Reply to a comment'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    actor = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)  # covered by event_actor_review_idx
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, db_index=False)  # covered by event_game_review_idx
+    review = models.ForeignKey(Review, on_delete=models.DO_NOTHING, null=True, blank=True,
+                               db_constraint=False, db_index=False, related_name='+')
+    comment = models.ForeignKey(Comment, on_delete=models.DO_NOTHING, null=True, blank=True,
+                                db_constraint=False, db_index=False, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Newest reviews of a game or by a critic, merged into the feeds of their followers at read time
+            models.Index(fields=['game', '-id'], name='event_game_review_idx', condition=models.Q(kind='review')),
+            models.Index(fields=['actor', '-id'], name='event_actor_review_idx', condition=models.Q(kind='review')),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} by {self.actor_id} on game {self.game_id}"
+
+    @property
+    def target(self):
+        return self.review if self.kind == 'review' else self.comment
+
+
+# The events copied into a user's feed when they happened (fan-out on write)
+class FeedEntry(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)  # covered by unique_feed_entry
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            # Also the index a feed page is read through: one range scan, newest event first
+            models.UniqueConstraint(fields=['user', 'event'], name='unique_feed_entry'),
+        ]
+
+
 # Tag model
 class Tag(models.Model):
     tag_name = models.CharField(max_length=255)
@@ -127,17 +342,60 @@ class Platform(models.Model):
         return self.platform_name
 
 
+# Precomputed ranked lists, replaced by `manage.py refresh_rankings`
+class Ranking(models.Model):
+    LIST_CHOICES = [
+        ('top_rated', 'Top Rated'),
+        ('trending', 'Trending'),
+        ('most_helpful', 'Most Helpful Reviews'),
+    ]
+
+    list = models.CharField(max_length=20, choices=LIST_CHOICES)
+    position = models.PositiveIntegerField()
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='+')
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    score = models.FloatField()
+    # The catalogue mean top_rated scores were computed with, reused by incremental refreshes
+    catalogue_mean = models.FloatField(null=True, blank=True)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # Also the index the lists are read through, in order
+            models.UniqueConstraint(fields=['list', 'position'], name='unique_ranking_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.list} #{self.position}: {self.game_id}"
+
+
 # Many-to-Many Relationships
+# The unique (game, x) constraints also index lookups by game, so the game FKs skip their own index
 class GameTag(models.Model):
-    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, db_index=False)
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'tag'], name='unique_game_tag'),
+        ]
+
 
 class GameCategory(models.Model):
-    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, db_index=False)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'category'], name='unique_game_category'),
+        ]
+
 
 class GamePlatform(models.Model):
-    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, db_index=False)
     platform = models.ForeignKey(Platform, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'platform'], name='unique_game_platform'),
+        ]
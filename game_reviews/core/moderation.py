@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .caching import bump_critic_stats_version, bump_game_version
+from .comments import thread_ids_sql
+from .models import Comment, Like, Ranking, Review, ReviewVote
+from .pagination import paginate_keyset
+from .ratings import rebuild_rating_aggregates
+
+MODERATION_PAGE_SIZE = 50
+
+# Bulk actions, with the verb reported back to the moderator
+MODERATION_ACTIONS = {'delete': 'Deleted', 'hide': 'Hid', 'approve': 'Approved'}
+
+
+def reported_reviews(cursor=None, page_size=MODERATION_PAGE_SIZE):
+    """
+    A KeysetPage of the reported reviews that are still visible, most reported
+    first, read through the partial review_reported_idx.
+    """
+    return paginate_keyset(
+        Review.objects.filter(report_count__gt=0).exclude(status='hidden').select_related('user', 'game'),
+        ('-report_count', '-id'),
+        cursor,
+        page_size,
+    )
+
+
+def pending_comments(cursor=None, page_size=MODERATION_PAGE_SIZE):
+    """
+    A KeysetPage of the comments no moderator has looked at yet, newest first.
+    """
+    return paginate_keyset(
+        Comment.objects.filter(status='pending').select_related('user', 'game'),
+        ('-created', '-id'),
+        cursor,
+        page_size,
+    )
+
+
+def affected_ids(queryset, field):
+    return set(queryset.order_by().values_list(field, flat=True).distinct())
+
+
+def moderate_comments(comments, action):
+    """
+    Applies a moderation action to every comment in the queryset, whatever its
+    size, in one transaction. 'delete' removes the comments with all their
+    replies and likes, 'hide' takes them out of the threads and 'approve' takes
+    them out of the queue. Returns the number of comments changed.
+
+    Each action is a set-based statement (deletes need one per table): rows are
+    never loaded, and no per-row signals run, so the like counters of deleted
+    comments aren't touched and the caches are invalidated once per game.
+    """
+    with transaction.atomic():
+        game_ids = affected_ids(comments, 'game_id')
+        if action == 'delete':
+            thread = thread_ids_sql(comments)
+            Like.objects.filter(comment_id__in=thread)._raw_delete(Like.objects.db)
+            changed = Comment.objects.filter(id__in=thread)._raw_delete(Comment.objects.db)
+        else:
+            changed = comments.update(status='hidden' if action == 'hide' else 'approved')
+
+    if action != 'approve':
+        for game_id in game_ids:
+            bump_game_version(game_id, 'comments')
+    return changed
+
+
+def moderate_reviews(reviews, action):
+    """
+    Applies a moderation action to every review in the queryset in one
+    transaction. 'delete' removes the reviews with their votes, 'hide' takes them
+    out of the listings and rating aggregates, and 'approve' dismisses their
+    reports. Returns the number of reviews changed.
+
+    Like moderate_comments, every step is set-based. The rating aggregates of
+    the affected games are rebuilt with one grouped query instead of a signal
+    per review.
+    """
+    review_ids = reviews.order_by().values('id')
+    with transaction.atomic():
+        game_ids = affected_ids(reviews, 'game_id')
+        critic_ids = affected_ids(reviews, 'user_id')
+        if action != 'approve':
+            # Ranked lists keep a gap until the next refresh_rankings
+            Ranking.objects.filter(review_id__in=review_ids)._raw_delete(Ranking.objects.db)
+        if action == 'delete':
+            ReviewVote.objects.filter(review_id__in=review_ids)._raw_delete(ReviewVote.objects.db)
+            changed = Review.objects.filter(id__in=review_ids)._raw_delete(Review.objects.db)
+        elif action == 'hide':
+            changed = reviews.update(status='hidden')
+        else:
+            ReviewVote.objects.filter(review_id__in=review_ids, kind='report')._raw_delete(ReviewVote.objects.db)
+            # Recounted rather than zeroed, so a report landing meanwhile isn't lost
+            remaining = (
+                ReviewVote.objects.filter(review=OuterRef('pk'), kind='report')
+                .order_by().values('review').annotate(n=Count('id')).values('n')
+            )
+            changed = reviews.update(status='approved', report_count=Coalesce(Subquery(remaining), Value(0)))
+
+        if action != 'approve':
+            rebuild_rating_aggregates(game_ids=game_ids)
+
+    if action != 'approve':
+        for game_id in game_ids:
+            bump_game_version(game_id, 'card', 'reviews')
+        for user_id in critic_ids:
+            bump_critic_stats_version(user_id)
+    return changed
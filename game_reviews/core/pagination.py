@@ -0,0 +1,122 @@
+import base64
+import json
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset. `next_cursor` is None on the last page.
+    """
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keeps datetimes to the microsecond, which DjangoJSONEncoder cuts to
+    milliseconds: a cursor on a truncated timestamp would skip the rows that
+    share the second but sort after it.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return {'dt': o.isoformat()}
+        return super().default(o)
+
+
+def decode_value(obj):
+    if obj.keys() == {'dt'}:
+        value = parse_datetime(obj['dt']) if isinstance(obj['dt'], str) else None
+        if value is None:
+            raise ValueError("Invalid cursor")
+        return value
+    return obj
+
+
+def encode_cursor(values):
+    data = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """
+    Returns the list of values stored in a cursor, raising ValueError if it's
+    malformed or holds anything but scalars.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()), object_hook=decode_value)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor")
+    if not all(isinstance(value, (str, int, float, datetime)) for value in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Builds the "comes after this row" condition for an ordering such as
+    ('-release_date', '-id'), i.e. (a < x) OR (a = x AND b < y) for descending keys.
+    """
+    conditions = []
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {prev.lstrip('-'): value for prev, value in zip(ordering[:i], values[:i])}
+        conditions.append(Q(**equal, **{f'{name}__{lookup}': values[i]}))
+    return reduce(or_, conditions)
+
+
+def paginate_keyset(queryset, ordering, cursor=None, page_size=25):
+    """
+    Seek pagination: instead of OFFSET, each page starts right after the last row
+    of the previous one, so page 1000 costs the same index range scan as page 1.
+
+    `ordering` must end in a unique field (usually the pk) and the fields must be
+    non-nullable. Works on model querysets and on .values() querysets.
+    """
+    ordering = tuple(ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, len(ordering))
+        try:
+            queryset = queryset.filter(keyset_filter(ordering, values))
+        except (TypeError, ValidationError) as e:
+            # A value the field can't take, e.g. a string where a datetime goes
+            raise ValueError("Invalid cursor") from e
+
+    # One extra row tells us whether there is a next page
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        names = [field.lstrip('-') for field in ordering]
+        if isinstance(last, dict):
+            values = [last[name] for name in names]
+        else:
+            values = [getattr(last, name) for name in names]
+        next_cursor = encode_cursor(values)
+
+    return KeysetPage(items, next_cursor)
@@ -0,0 +1,163 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Comment, Game, Ranking, Review
+
+# A review counts this many times a comment towards trending
+TRENDING_REVIEW_WEIGHT = 3
+
+
+def ranking_size():
+    return getattr(settings, 'RANKING_SIZE', 20)
+
+
+def top_rated_entries(size, full=False):
+    """
+    Games by Bayesian average: their ratings plus RANKING_PRIOR_REVIEWS phantom
+    reviews at the catalogue mean, so a single 5-star review doesn't top the list.
+    Reads the stored rating aggregates, not the review table.
+
+    Only the games rated since the last refresh (flagged ranking_dirty) are
+    rescored against the stored list, with the catalogue mean it was computed
+    with. The whole catalogue is ranked again, with a fresh mean, when `full` is
+    set or when the dirty games alone can't decide the list. Clears the flags,
+    so it runs in the transaction that stores the list.
+    """
+    prior = getattr(settings, 'RANKING_PRIOR_REVIEWS', 5)
+    if not full:
+        entries = rescored_top_rated(size, prior)
+        if entries is not None:
+            return entries
+
+    Game.objects.filter(ranking_dirty=True).update(ranking_dirty=False)
+    totals = Game.objects.aggregate(ratings=Sum('rating_count'), stars=Sum('rating_sum'))
+    if not totals['ratings']:
+        return []
+    mean = totals['stars'] / totals['ratings']
+
+    games = (
+        Game.objects.filter(rating_count__gt=0)
+        .annotate(score=(Value(prior * mean) + Cast('rating_sum', FloatField())) / (Value(prior) + F('rating_count')))
+        .order_by('-score', '-id')
+        .values_list('id', 'score')[:size]
+    )
+    return [{'game_id': game_id, 'score': score, 'catalogue_mean': mean} for game_id, score in games]
+
+
+def rescored_top_rated(size, prior):
+    """
+    The stored top_rated list with the dirty games rescored, or None when a full
+    ranking is needed: the list is short or has no mean, too many games changed
+    (RANKING_MAX_DIRTY), or a listed game fell below the list's last entry, where
+    an unlisted game may now outrank it.
+    """
+    listed = list(
+        Ranking.objects.filter(list='top_rated').order_by('position')
+        .values_list('game_id', 'score', 'catalogue_mean')
+    )
+    if len(listed) < size or listed[0][2] is None:
+        return None
+    max_dirty = getattr(settings, 'RANKING_MAX_DIRTY', 1000)
+    dirty = list(Game.objects.filter(ranking_dirty=True).values_list('id', flat=True)[:max_dirty + 1])
+    if len(dirty) > max_dirty:
+        return None
+
+    mean = listed[0][2]
+    scores = {game_id: score for game_id, score, _ in listed}
+    # Every unlisted game scored below the last entry, and the clean ones still do
+    cutoff = min((score, game_id) for game_id, score in scores.items())
+    if dirty:
+        Game.objects.filter(pk__in=dirty).update(ranking_dirty=False)
+        rescored = {
+            game_id: (prior * mean + stars) / (prior + count)
+            for game_id, stars, count in Game.objects.filter(pk__in=dirty, rating_count__gt=0)
+            .values_list('id', 'rating_sum', 'rating_count')
+        }
+        for game_id in scores.keys() & set(dirty):
+            if game_id not in rescored or (rescored[game_id], game_id) < cutoff:
+                return None
+        scores.update(rescored)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:size]
+    return [{'game_id': game_id, 'score': score, 'catalogue_mean': mean} for game_id, score in ranked]
+
+
+def trending_entries(size):
+    """
+    Games by reviews and comments per day over the last TRENDING_DAYS days.
+    Only the recent rows are read, through the created-at indexes.
+    """
+    days = getattr(settings, 'TRENDING_DAYS', 7)
+    since = timezone.now() - timedelta(days=days)
+
+    activity = Counter()
+    reviews = Review.objects.filter(created_at__gte=since).exclude(status='hidden').values('game_id').annotate(n=Count('id')).order_by()
+    for row in reviews:
+        activity[row['game_id']] += row['n'] * TRENDING_REVIEW_WEIGHT
+    comments = Comment.objects.filter(created__gte=since).exclude(status='hidden').values('game_id').annotate(n=Count('id')).order_by()
+    for row in comments:
+        activity[row['game_id']] += row['n']
+
+    ranked = sorted(activity.items(), key=lambda item: (-item[1], -item[0]))[:size]
+    return [{'game_id': game_id, 'score': count / days} for game_id, count in ranked]
+
+
+def most_helpful_entries(size):
+    reviews = (
+        Review.objects.filter(helpful_votes__gt=0).exclude(status='hidden')
+        .order_by('-helpful_votes', '-id')
+        .values_list('id', 'game_id', 'helpful_votes')[:size]
+    )
+    return [{'review_id': review_id, 'game_id': game_id, 'score': votes} for review_id, game_id, votes in reviews]
+
+
+RANKINGS = {
+    'top_rated': top_rated_entries,
+    'trending': trending_entries,
+    'most_helpful': most_helpful_entries,
+}
+
+
+def refresh_rankings(lists=None, full=False):
+    """
+    Recomputes the given ranked lists (all by default) and swaps each in atomically.
+    top_rated only rescores the games rated since the last refresh unless `full`
+    is set; trending and most_helpful read bounded index ranges and are always
+    computed in full. Returns {list: number of entries}.
+    """
+    size = ranking_size()
+    now = timezone.now()
+    stored = {}
+    for name in lists or RANKINGS:
+        with transaction.atomic():
+            entries = top_rated_entries(size, full) if name == 'top_rated' else RANKINGS[name](size)
+            rows = [
+                Ranking(list=name, position=position, computed_at=now, **entry)
+                for position, entry in enumerate(entries, start=1)
+            ]
+            Ranking.objects.filter(list=name).delete()
+            Ranking.objects.bulk_create(rows)
+        stored[name] = len(rows)
+    return stored
+
+
+def load_rankings(limit=10):
+    """
+    Reads every ranked list in one indexed query: {list: [Ranking, ...]}, each with
+    its game (and review, with its author, for most_helpful) loaded.
+    """
+    lists = {name: [] for name in RANKINGS}
+    entries = (
+        Ranking.objects.filter(list__in=RANKINGS, position__lte=limit)
+        .select_related('game', 'review__user')
+        .order_by('list', 'position')
+    )
+    for entry in entries:
+        lists[entry.list].append(entry)
+    return lists
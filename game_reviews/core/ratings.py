@@ -0,0 +1,90 @@
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+
+from .caching import bump_game_versions
+from .models import Game, Review
+
+
+def apply_rating_delta(game_id, rating, delta):
+    """
+    Adds (delta=1) or removes (delta=-1) a single rating from a game's stored
+    aggregates in one UPDATE, using F() expressions so concurrent reviews
+    don't overwrite each other's counts, and marks it for the next ranking refresh.
+    """
+    if game_id is None or rating is None:
+        return
+
+    new_count = F('rating_count') + delta
+    new_sum = F('rating_sum') + delta * rating
+
+    Game.objects.filter(pk=game_id).update(
+        rating_count=new_count,
+        rating_sum=new_sum,
+        # SET expressions see the old row values, so the mean is derived from
+        # the new count and sum here rather than from the updated columns
+        rating_avg=Case(
+            When(rating_count=-delta, then=Value(0.0)),
+            default=Cast(new_sum, FloatField()) / Cast(new_count, FloatField()),
+            output_field=FloatField(),
+        ),
+        **{f'rating_{rating}_count': F(f'rating_{rating}_count') + delta},
+        ranking_dirty=True,
+    )
+
+
+def rebuild_rating_aggregates(batch_size=1000, game_ids=None):
+    """
+    Recomputes the rating aggregates of every game (or only of `game_ids`) from
+    the Review table with a single grouped query, leaving hidden reviews out, and
+    writes back the ones that changed with bulk_update, bumping their cached
+    cards. Returns the number of games updated.
+    """
+    histogram = {
+        f'rating_{stars}_count': Count('id', filter=Q(rating=stars))
+        for stars in range(1, 6)
+    }
+    reviews = Review.objects.exclude(status='hidden')
+    games = Game.objects.all()
+    if game_ids is not None:
+        reviews = reviews.filter(game_id__in=game_ids)
+        games = games.filter(pk__in=game_ids)
+    rows = (
+        reviews.values('game_id')
+        .annotate(rating_count=Count('id'), rating_sum=Sum('rating'), **histogram)
+        .order_by()
+    )
+    aggregates = {row.pop('game_id'): row for row in rows}
+
+    fields = ['rating_count', 'rating_sum', 'rating_avg', *histogram]
+    empty = dict.fromkeys(fields, 0)
+
+    updated = 0
+    batch = []
+    for game in games.only('id', *fields).iterator(chunk_size=batch_size):
+        stored = [getattr(game, field) for field in fields]
+        values = aggregates.get(game.id, empty)
+        for field in fields:
+            if field != 'rating_avg':
+                setattr(game, field, values[field])
+        game.rating_avg = game.rating_sum / game.rating_count if game.rating_count else 0
+        if [getattr(game, field) for field in fields] == stored:
+            continue
+        batch.append(game)
+
+        if len(batch) >= batch_size:
+            updated += write_rating_aggregates(batch, fields)
+            batch = []
+
+    if batch:
+        updated += write_rating_aggregates(batch, fields)
+
+    return updated
+
+
+def write_rating_aggregates(games, fields):
+    for game in games:
+        game.ranking_dirty = True
+    # bulk_update skips the signals that invalidate the games' cached cards
+    Game.objects.bulk_update(games, [*fields, 'ranking_dirty'])
+    bump_game_versions([game.id for game in games], 'card')
+    return len(games)
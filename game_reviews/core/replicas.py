@@ -0,0 +1,114 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Apps read on every request right after being written (a login writes the session
+# the next page reads), so they never go to a replica
+PRIMARY_ONLY_APPS = {'sessions'}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Set for a few seconds after a write; while present, the client's reads go to the primary
+READ_YOUR_WRITES_COOKIE = 'primary_reads'
+
+
+class RoutingState:
+    """
+    Whether the current request must read from the primary, and whether it wrote.
+    Mutated in place, so the threads serving an async request share it.
+    """
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# None outside requests: management commands and background work read from the primary
+current_routing = ContextVar('current_db_routing', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaRouter:
+    """
+    Sends writes to the primary ('default') and spreads the reads of requests
+    over the replicas in DATABASE_REPLICAS. Reads stay on the primary inside a
+    transaction, for requests pinned by ReplicaStickinessMiddleware, for the
+    rest of a request once it has written (a replica may not have its write
+    yet) and outside requests altogether.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        state = current_routing.get()
+        if (not replicas or state is None or state.pinned or state.wrote
+                or model._meta.app_label in PRIMARY_ONLY_APPS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current_routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # every alias holds the same data
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS  # replicas get their schema through replication
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes for replica routing: a request that writes, or uses an
+    unsafe method, gets a cookie that keeps the client's reads on the primary
+    for READ_YOUR_WRITES_SECONDS, long enough for the replicas to catch up.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(self.must_read_primary(request))
+        token = current_routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(self.must_read_primary(request))
+        token = current_routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.finish(request, response, state)
+
+    @staticmethod
+    def must_read_primary(request):
+        return request.method not in SAFE_METHODS or READ_YOUR_WRITES_COOKIE in request.COOKIES
+
+    @staticmethod
+    def finish(request, response, state):
+        if state.wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                READ_YOUR_WRITES_COOKIE, '1', max_age=getattr(settings, 'READ_YOUR_WRITES_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,88 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from .caching import bump_game_versions
+from .models import Review, ReviewVote
+
+# The Review counter each kind of vote is tallied in
+VOTE_COUNTERS = {
+    'helpful': 'helpful_votes',
+    'report': 'report_count',
+}
+
+
+def apply_vote_delta(review_id, kind, delta):
+    """
+    Adds delta to the review's counter for the vote kind in one UPDATE. The F()
+    expression is evaluated by the database, so concurrent votes don't overwrite
+    each other, and the row lock is only held by the short transaction that
+    adds or removes the vote.
+    """
+    field = VOTE_COUNTERS[kind]
+    Review.objects.filter(pk=review_id).update(**{field: Coalesce(F(field), Value(0)) + delta})
+
+
+def user_votes(user, review_ids):
+    """
+    Returns the (review_id, kind) pairs of the votes the user has cast on the
+    given reviews, in a single query.
+    """
+    if not user.is_authenticated or not review_ids:
+        return set()
+    return set(ReviewVote.objects.filter(user=user, review_id__in=review_ids).values_list('review_id', 'kind'))
+
+
+def add_vote(user, review, kind):
+    """
+    Casts the vote unless the user already has. Returns True if a vote was added;
+    the unique constraint on (user, review, kind) settles requests racing each other.
+    """
+    try:
+        with transaction.atomic():
+            ReviewVote.objects.create(user=user, review=review, kind=kind)
+    except IntegrityError:
+        return False  # already voted, possibly by a concurrent request
+    return True
+
+
+def toggle_helpful_vote(user, review):
+    """
+    Marks the review helpful, or takes the vote back if the user already did.
+    Returns True if the review is marked helpful afterwards.
+    """
+    with transaction.atomic():
+        # Locking the vote first makes a racing toggle wait and then find it gone;
+        # two plain deletes would both send post_delete and decrement the counter twice
+        vote = ReviewVote.objects.select_for_update().filter(user=user, review=review, kind='helpful').first()
+        if vote is not None:
+            vote.delete()
+            return False
+    add_vote(user, review, 'helpful')
+    return True
+
+
+def report_review(user, review):
+    """
+    Reports the review for moderation. Reports can't be withdrawn; reporting
+    again is a no-op. Returns True if this call added the report.
+    """
+    return add_vote(user, review, 'report')
+
+
+def delete_user(user):
+    """
+    Deletes the user; use it instead of user.delete(). Their votes on reviews
+    that stay are taken out of those reviews' counters with one UPDATE per vote
+    kind, and the games' 'votes' versions are bumped once each: the signals skip
+    votes deleted in a cascade rather than updating them one row at a time.
+    """
+    votes = ReviewVote.objects.filter(user=user).exclude(review__user=user)
+    with transaction.atomic():
+        game_ids = set(votes.filter(kind='helpful').values_list('review__game_id', flat=True))
+        for kind, field in VOTE_COUNTERS.items():
+            Review.objects.filter(pk__in=votes.filter(kind=kind).values('review_id')).update(
+                **{field: Coalesce(F(field), Value(0)) - 1}
+            )
+        user.delete()
+    bump_game_versions(game_ids, 'votes')
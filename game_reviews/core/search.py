@@ -0,0 +1,144 @@
+import hashlib
+import json
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast
+
+from .caching import bump_collection_version, collection_version, get_or_set_fragment
+from .models import Game, GameCategory, GamePlatform, GameTag
+
+# Weighted so title matches rank above developer/publisher, then description
+GAME_SEARCH_VECTOR = (
+    SearchVector('title', weight='A')
+    + SearchVector('developer', 'publisher', weight='B')
+    + SearchVector('description', weight='C')
+)
+
+# Facets stored in the M2M through-tables: (through model, id column, label lookup)
+M2M_FACETS = {
+    'tag': (GameTag, 'tag_id', 'tag__tag_name'),
+    'category': (GameCategory, 'category_id', 'category__category_name'),
+    'platform': (GamePlatform, 'platform_id', 'platform__platform_name'),
+}
+
+# Facets stored as plain columns on Game
+FIELD_FACETS = ('genre', 'age_rating')
+
+FACETS = (*M2M_FACETS, *FIELD_FACETS)
+
+FACET_LABELS = {
+    'tag': 'Tag',
+    'category': 'Category',
+    'platform': 'Platform',
+    'genre': 'Genre',
+    'age_rating': 'Age Rating',
+}
+
+# Cache version of every facet count, bumped by core.signals whenever a game,
+# its tags/categories/platforms or their names change
+FACET_COLLECTION = 'facet'
+
+# Text searches on PostgreSQL list the best matches first
+RANK_ORDERING = ('-rank', '-id')
+
+
+def update_search_vectors(game_ids=None):
+    """
+    Recomputes the search document in the database, for the given games or all of them.
+    """
+    if connection.vendor != 'postgresql':
+        # tsvector only exists on PostgreSQL; filter_games falls back to a title match
+        return 0
+    games = Game.objects.all()
+    if game_ids is not None:
+        games = games.filter(pk__in=game_ids)
+    return games.update(search_vector=GAME_SEARCH_VECTOR)
+
+
+def is_ranked(query):
+    return bool(query) and connection.vendor == 'postgresql'
+
+
+def filter_games(queryset, query='', filters=None):
+    """
+    Applies a full-text query and facet filters, e.g. {'tag': [3], 'platform': [1],
+    'age_rating': [18]}. Values within a facet are ORed, facets are ANDed.
+    M2M facets filter through a subquery on the through-table, so games never
+    come back duplicated. Ranked queries (is_ranked) annotate each game's
+    relevance as `rank`, for RANK_ORDERING.
+    """
+    if is_ranked(query):
+        search_query = SearchQuery(query, search_type='websearch')
+        # ts_rank returns a real; as a double it survives the cursor's round trip exactly
+        queryset = queryset.filter(search_vector=search_query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), search_query), FloatField()),
+        )
+    elif query:
+        queryset = queryset.filter(title__icontains=query)
+
+    for facet, values in (filters or {}).items():
+        if not values:
+            continue
+        if facet in M2M_FACETS:
+            through, id_field, _ = M2M_FACETS[facet]
+            game_ids = through.objects.filter(**{f'{id_field}__in': values}).values('game_id')
+            queryset = queryset.filter(pk__in=game_ids)
+        elif facet in FIELD_FACETS:
+            queryset = queryset.filter(**{f'{facet}__in': values})
+
+    return queryset
+
+
+def facet_counts(queryset):
+    """
+    Counts the games of `queryset` per facet value, one GROUP BY query per facet.
+    Returns {facet: [{'value': ..., 'label': ..., 'count': ...}, ...]}.
+    """
+    game_ids = queryset.order_by().values('pk')
+    facets = {}
+
+    for facet, (through, id_field, label_field) in M2M_FACETS.items():
+        rows = (
+            through.objects.filter(game_id__in=game_ids)
+            .values(id_field, label_field)
+            .annotate(count=Count('game_id', distinct=True))
+            .order_by('-count', label_field)
+        )
+        facets[facet] = [
+            {'value': str(row[id_field]), 'label': row[label_field], 'count': row['count']}
+            for row in rows
+        ]
+
+    for facet in FIELD_FACETS:
+        rows = queryset.order_by().values(facet).annotate(count=Count('pk')).order_by('-count', facet)
+        facets[facet] = [
+            {'value': str(row[facet]), 'label': str(row[facet]), 'count': row['count']}
+            for row in rows
+        ]
+
+    return facets
+
+
+def cached_facet_counts(query='', filters=None):
+    """
+    facet_counts of a search, cached under the facet version, so a repeated
+    query (and the unfiltered landing page) costs one cache read until the
+    catalogue changes.
+    """
+    filters = {facet: sorted(values) for facet, values in (filters or {}).items() if values}
+    digest = hashlib.md5(json.dumps([query, filters], sort_keys=True).encode()).hexdigest()
+    return get_or_set_fragment(
+        'search_facets', [collection_version(FACET_COLLECTION), digest],
+        lambda: facet_counts(filter_games(Game.objects.all(), query, filters)),
+    )
+
+
+def refresh_facet_counts():
+    """
+    Invalidates every cached facet count, for writes that skip the signals, and
+    builds the landing page's again. Returns the number of facet values.
+    """
+    bump_collection_version(FACET_COLLECTION)
+    return sum(len(entries) for entries in cached_facet_counts().values())
@@ -0,0 +1,244 @@
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from collections import defaultdict
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Category, Comment, CustomUser, Event, FeedEntry, Follow, Game, GameCategory, GamePlatform, GameTag, Like,
+    Platform, Review, ReviewVote, Tag,
+)
+from .families import rebuild_family_paths
+from .feed import fanout_limit
+from .rankings import refresh_rankings
+from .ratings import rebuild_rating_aggregates
+from .search import refresh_facet_counts, update_search_vectors
+
+TAG_NAMES = ['RPG', 'Shooter', 'Strategy', 'Indie', 'Open World', 'Multiplayer', 'Horror', 'Puzzle',
+             'Racing', 'Simulation', 'Survival', 'Roguelike', 'Platformer', 'Sports', 'Story Rich']
+CATEGORY_NAMES = ['Action', 'Adventure', 'Casual', 'Family', 'Competitive', 'Co-op']
+PLATFORM_NAMES = ['PC', 'PlayStation 5', 'Xbox Series X', 'Nintendo Switch', 'Mobile']
+GENRES = ['RPG', 'Action', 'Strategy', 'Adventure', 'Shooter', 'Sports', 'Puzzle']
+AGE_RATINGS = [3, 7, 12, 16, 18]
+WORDS = ['epic', 'dragon', 'quest', 'space', 'dark', 'legend', 'city', 'war', 'star', 'shadow',
+         'island', 'kingdom', 'racer', 'tactics', 'dungeon', 'zero', 'light', 'storm', 'iron', 'soul']
+
+
+@contextmanager
+def preserve_timestamps(*fields):
+    """
+    Lets bulk_create keep the timestamps we generate instead of auto_now_add's now().
+    """
+    previous = [(field, field.auto_now_add) for field in fields]
+    for field, _ in previous:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in previous:
+            field.auto_now_add = auto_now_add
+
+
+def lookup_objects(model, field, names):
+    existing = {getattr(obj, field): obj for obj in model.objects.filter(**{f'{field}__in': names})}
+    missing = [model(**{field: name}) for name in names if name not in existing]
+    model.objects.bulk_create(missing)
+    return list(model.objects.filter(**{f'{field}__in': names}))
+
+
+def seed_dataset(games=1000, critics=50, users=200, reviews_per_game=10, comments_per_game=20,
+                 likes_per_comment=2, votes_per_review=3, follows_per_user=6, dlc_ratio=0.2, days=365, batch_size=2000, seed=None):
+    """
+    Inserts a synthetic catalogue with bulk_create: games with tags, categories and
+    platforms, DLCs, critic reviews with helpful votes, threaded comments and likes,
+    follows of games and critics and the activity feeds they lead to.
+    Timestamps are spread over the last `days` days. Denormalized counters and the
+    ranked lists are filled in at the end.
+    Returns the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    run = uuid.uuid4().hex[:8]  # keeps usernames/emails unique across seeding runs
+    now = timezone.now()
+
+    def timestamp():
+        return now - timedelta(seconds=rng.randint(0, days * 24 * 3600))
+
+    with transaction.atomic():
+        tags = lookup_objects(Tag, 'tag_name', TAG_NAMES)
+        categories = lookup_objects(Category, 'category_name', CATEGORY_NAMES)
+        platforms = lookup_objects(Platform, 'platform_name', PLATFORM_NAMES)
+
+        people = CustomUser.objects.bulk_create(
+            [
+                CustomUser(username=f'seed-{run}-critic-{i}', email=f'seed-{run}-critic-{i}@example.com',
+                           role='critic', password='!', publication=rng.choice(WORDS).title())
+                for i in range(critics)
+            ] + [
+                CustomUser(username=f'seed-{run}-user-{i}', email=f'seed-{run}-user-{i}@example.com',
+                           role='user', password='!')
+                for i in range(users)
+            ],
+            batch_size=batch_size,
+        )
+        critic_users, all_users = people[:critics], people
+
+        created_games = Game.objects.bulk_create(
+            [
+                Game(
+                    title=' '.join(rng.sample(WORDS, 3)).title() + f' {i}',
+                    description=' '.join(rng.choices(WORDS, k=30)),
+                    developer=rng.choice(WORDS).title() + ' Studios',
+                    publisher=rng.choice(WORDS).title() + ' Interactive',
+                    release_date=date.today() - timedelta(days=rng.randint(0, 20 * 365)),
+                    age_rating=rng.choice(AGE_RATINGS),
+                    genre=rng.choice(GENRES),
+                    steam_app_id=rng.randint(10, 2_000_000),
+                )
+                for i in range(games)
+            ],
+            batch_size=batch_size,
+        )
+
+        # A share of the catalogue becomes DLC of an earlier game
+        dlcs = []
+        for index, game in enumerate(created_games[1:], start=1):
+            parent = created_games[rng.randrange(index)]
+            if rng.random() < dlc_ratio and parent.parent_game_id is None:
+                game.parent_game = parent
+                dlcs.append(game)
+        Game.objects.bulk_update(dlcs, ['parent_game'], batch_size=batch_size)
+        rebuild_family_paths()
+
+        game_tags, game_categories, game_platforms = [], [], []
+        for game in created_games:
+            game_tags += [GameTag(game=game, tag=tag) for tag in rng.sample(tags, rng.randint(1, 4))]
+            game_categories += [GameCategory(game=game, category=category)
+                                for category in rng.sample(categories, rng.randint(1, 2))]
+            game_platforms += [GamePlatform(game=game, platform=platform)
+                               for platform in rng.sample(platforms, rng.randint(1, 3))]
+        GameTag.objects.bulk_create(game_tags, batch_size=batch_size)
+        GameCategory.objects.bulk_create(game_categories, batch_size=batch_size)
+        GamePlatform.objects.bulk_create(game_platforms, batch_size=batch_size)
+
+        reviews = []
+        for game in created_games:
+            for critic in rng.sample(critic_users, min(reviews_per_game, len(critic_users))):
+                reviews.append(Review(
+                    game=game, user=critic, rating=rng.randint(1, 5),
+                    title=' '.join(rng.choices(WORDS, k=4)).capitalize(),
+                    comment=' '.join(rng.choices(WORDS, k=60)),
+                    created_at=timestamp(),
+                ))
+
+        comments = []
+        for game in created_games:
+            for _ in range(comments_per_game):
+                comments.append(Comment(
+                    game=game, user=rng.choice(all_users), created=timestamp(),
+                    comment=' '.join(rng.choices(WORDS, k=12)),
+                ))
+
+        with preserve_timestamps(Review._meta.get_field('created_at'), Comment._meta.get_field('created')):
+            reviews = Review.objects.bulk_create(reviews, batch_size=batch_size)
+            comments = Comment.objects.bulk_create(comments, batch_size=batch_size)
+
+        # Turn about a third of the comments into replies to an earlier comment on the same game
+        replies = []
+        for index, comment in enumerate(comments):
+            first_of_game = index - index % comments_per_game
+            if index > first_of_game and rng.random() < 0.33:
+                comment.parent = comments[rng.randrange(first_of_game, index)]
+                replies.append(comment)
+        Comment.objects.bulk_update(replies, ['parent'], batch_size=batch_size)
+
+        likes = []
+        for comment in comments:
+            likers = rng.sample(all_users, min(rng.randint(0, likes_per_comment * 2), len(all_users)))
+            likes += [Like(user=user, comment=comment) for user in likers]
+            comment.like_count = len(likers)
+        Like.objects.bulk_create(likes, batch_size=batch_size)
+        Comment.objects.bulk_update(comments, ['like_count'], batch_size=batch_size)
+
+        votes = []
+        for review in reviews:
+            voters = rng.sample(all_users, min(rng.randint(0, votes_per_review * 2), len(all_users)))
+            voters = [user for user in voters if user != review.user]  # no votes on one's own review
+            votes += [
+                ReviewVote(user=user, review=review, kind='helpful',
+                           created_at=review.created_at + (now - review.created_at) * rng.random())
+                for user in voters
+            ]
+            review.helpful_votes = len(voters)
+        with preserve_timestamps(ReviewVote._meta.get_field('created_at')):
+            ReviewVote.objects.bulk_create(votes, batch_size=batch_size)
+        Review.objects.bulk_update(reviews, ['helpful_votes'], batch_size=batch_size)
+
+        # Each user follows games and, for a third of their follows, critics other than themselves
+        follows = []
+        critic_follows = follows_per_user // 3
+        for user in all_users:
+            followed_games = rng.sample(created_games, min(follows_per_user - critic_follows, len(created_games)))
+            followed_critics = rng.sample(critic_users, min(critic_follows, len(critic_users)))
+            follows += [Follow(user=user, game=game) for game in followed_games]
+            follows += [Follow(user=user, critic=critic) for critic in followed_critics if critic != user]
+        followers = defaultdict(list)
+        for follow in follows:
+            followers[('game', follow.game_id) if follow.game_id else ('critic', follow.critic_id)].append(follow)
+        for source_follows in followers.values():
+            if len(source_follows) >= fanout_limit():
+                for follow in source_follows:
+                    follow.pull = True
+        Follow.objects.bulk_create(follows, batch_size=batch_size)
+
+        # The event log in time order, as the signals would have written it
+        parent_authors = {comment.id: comment.user_id for comment in comments}
+        events = [
+            Event(kind='review', actor_id=review.user_id, game_id=review.game_id, review=review,
+                  created_at=review.created_at)
+            for review in reviews
+        ] + [
+            Event(kind='reply', actor_id=reply.user_id, game_id=reply.game_id, comment=reply, created_at=reply.created)
+            for reply in replies if parent_authors[reply.parent_id] != reply.user_id
+        ]
+        events.sort(key=lambda event: event.created_at)
+        with preserve_timestamps(Event._meta.get_field('created_at')):
+            events = Event.objects.bulk_create(events, batch_size=batch_size)
+
+        feed_entries = []
+        for event in events:
+            if event.kind == 'reply':
+                feed_entries.append(FeedEntry(user_id=parent_authors[event.comment.parent_id], event=event))
+                continue
+            recipients = {
+                follow.user_id
+                for follow in followers[('game', event.game_id)] + followers[('critic', event.actor_id)]
+                if not follow.pull
+            }
+            recipients.discard(event.actor_id)
+            feed_entries += [FeedEntry(user_id=user_id, event=event) for user_id in recipients]
+        FeedEntry.objects.bulk_create(feed_entries, batch_size=batch_size)
+
+        # bulk_create skips the signals that maintain the rating aggregates and search index
+        rebuild_rating_aggregates(batch_size=batch_size)
+        update_search_vectors()
+        refresh_facet_counts()
+        refresh_rankings()
+
+    return {
+        'users': len(people),
+        'games': len(created_games),
+        'dlcs': len(dlcs),
+        'game_tags': len(game_tags),
+        'game_categories': len(game_categories),
+        'game_platforms': len(game_platforms),
+        'reviews': len(reviews),
+        'comments': len(comments),
+        'likes': len(likes),
+        'review_votes': len(votes),
+        'follows': len(follows),
+        'events': len(events),
+        'feed_entries': len(feed_entries),
+    }
@@ -0,0 +1,214 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.db.models import F, QuerySet
+from django.dispatch import receiver
+
+from .caching import bump_collection_version, bump_critic_stats_version, bump_game_version
+from .families import move_subtree, path_segment, stored_family_paths
+from .feed import publish_reply, publish_review
+from .media import schedule_image_variants
+from .models import Category, Comment, Game, Like, Platform, Review, ReviewVote, Tag
+from .ratings import apply_rating_delta
+from .reviews import apply_vote_delta
+from .search import FACET_COLLECTION, update_search_vectors
+
+
+def cascaded(vote, origin):
+    # Deleted along with its review, whose counters go too, or with its voter,
+    # whose delete_user corrects the counters and versions in bulk
+    if origin is None or origin is vote:
+        return False
+    return not (isinstance(origin, QuerySet) and origin.model is ReviewVote)
+
+
+def counted_rating(game_id, rating, status):
+    # Hidden reviews don't count towards the game's rating; apply_rating_delta skips a None rating
+    return (game_id, None if status == 'hidden' else rating)
+
+
+# Remember the rating a review was loaded with, so an edit can move the old
+# value out of the game's aggregates without re-reading the row
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    loaded = instance.__dict__  # avoids triggering a query for deferred fields
+    if instance.pk and all(field in loaded for field in ('game_id', 'rating', 'status')):
+        instance._stored_rating = counted_rating(loaded['game_id'], loaded['rating'], loaded['status'])
+    else:
+        instance._stored_rating = None
+
+
+@receiver(pre_save, sender=Review)
+@receiver(pre_delete, sender=Review)
+def load_stored_rating(sender, instance, **kwargs):
+    # Reviews loaded with only()/defer() have no snapshot yet
+    if not instance._state.adding and instance._stored_rating is None:
+        row = Review.objects.filter(pk=instance.pk).values_list('game_id', 'rating', 'status').first()
+        instance._stored_rating = counted_rating(*row) if row else None
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    previous = None if created else instance._stored_rating
+    current = counted_rating(instance.game_id, instance.rating, instance.status)
+
+    if previous != current:
+        if previous:
+            apply_rating_delta(*previous, delta=-1)
+        apply_rating_delta(*current, delta=1)
+
+    instance._stored_rating = current
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    if instance._stored_rating:
+        apply_rating_delta(*instance._stored_rating, delta=-1)
+
+
+@receiver(post_save, sender=Game)
+def update_game_search_vector(sender, instance, **kwargs):
+    update_search_vectors([instance.pk])
+
+
+# DLC families: a game's family_path follows its parent, and its DLCs follow it
+@receiver(pre_save, sender=Game)
+def place_game_in_family(sender, instance, update_fields=None, **kwargs):
+    instance._stored_family_path = None
+    if instance._state.adding or (update_fields is not None and 'parent_game' not in update_fields):
+        return  # new games get their path once they have an id
+    stored, parent_path = stored_family_paths(instance)
+    if stored and parent_path.startswith(stored):
+        raise ValueError("A game can't be a DLC of itself or of one of its DLCs.")
+    instance._stored_family_path = stored
+    instance.family_path = parent_path + path_segment(instance.pk)
+
+
+@receiver(post_save, sender=Game)
+def move_family_subtree(sender, instance, created, **kwargs):
+    if created:
+        instance.family_path = stored_family_paths(instance)[1] + path_segment(instance.pk)
+        Game.objects.filter(pk=instance.pk).update(family_path=instance.family_path)
+    elif instance._stored_family_path is not None:
+        move_subtree(instance._stored_family_path, instance.family_path)
+
+
+# Deleting a game turns its DLCs (set to no parent) into base games of their own subtrees
+@receiver(post_delete, sender=Game)
+def split_family(sender, instance, **kwargs):
+    move_subtree(instance.family_path, '')
+
+
+@receiver(post_init, sender=Game)
+def remember_game_image(sender, instance, **kwargs):
+    instance._stored_image = instance.__dict__.get('image')
+
+
+# New or replaced cover images get their resized variants built in the background
+@receiver(post_save, sender=Game)
+def process_game_image(sender, instance, **kwargs):
+    image_name = instance.image.name if instance.image else None
+    stored_name = getattr(instance._stored_image, 'name', instance._stored_image)
+    if image_name and image_name != stored_name:
+        schedule_image_variants(instance.pk)
+    instance._stored_image = image_name
+
+
+@receiver(post_save, sender=Like)
+def increment_like_count(sender, instance, created, **kwargs):
+    if created:
+        Comment.objects.filter(pk=instance.comment_id).update(like_count=F('like_count') + 1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_like_count(sender, instance, **kwargs):
+    Comment.objects.filter(pk=instance.comment_id).update(like_count=F('like_count') - 1)
+
+
+# Fragment cache invalidation: bump the affected game's versions so stale fragments are never read again
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def invalidate_game_fragments(sender, instance, **kwargs):
+    bump_game_version(instance.pk)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_fragments(sender, instance, **kwargs):
+    bump_game_version(instance.game_id, 'card', 'reviews')
+    bump_critic_stats_version(instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_fragments(sender, instance, **kwargs):
+    bump_game_version(instance.game_id, 'comments')
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_like_fragments(sender, instance, **kwargs):
+    game_id = Comment.objects.filter(pk=instance.comment_id).values_list('game_id', flat=True).first()
+    if game_id is not None:
+        bump_game_version(game_id, 'comments')
+
+
+@receiver(post_save, sender=ReviewVote)
+@receiver(post_delete, sender=ReviewVote)
+def invalidate_vote_versions(sender, instance, origin=None, **kwargs):
+    if instance.kind != 'helpful':
+        return  # report counts aren't shown anywhere versioned
+    if cascaded(instance, origin):
+        return
+    game_id = Review.objects.filter(pk=instance.review_id).values_list('game_id', flat=True).first()
+    if game_id is not None:
+        bump_game_version(game_id, 'votes')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Platform)
+@receiver(post_delete, sender=Platform)
+def invalidate_lookup_collection(sender, instance, **kwargs):
+    bump_collection_version(sender._meta.model_name)
+    bump_collection_version(FACET_COLLECTION)  # facet labels are their names
+
+
+# Search facet counts: a game's genre/age rating or its tags, categories or platforms changed
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def invalidate_facet_counts(sender, **kwargs):
+    bump_collection_version(FACET_COLLECTION)
+
+
+@receiver(m2m_changed, sender=Game.tags.through)
+@receiver(m2m_changed, sender=Game.category.through)
+@receiver(m2m_changed, sender=Game.platform.through)
+def invalidate_facet_counts_on_m2m(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_collection_version(FACET_COLLECTION)
+
+
+@receiver(post_save, sender=ReviewVote)
+def increment_vote_count(sender, instance, created, **kwargs):
+    if created:
+        apply_vote_delta(instance.review_id, instance.kind, 1)
+
+
+@receiver(post_delete, sender=ReviewVote)
+def decrement_vote_count(sender, instance, origin=None, **kwargs):
+    if not cascaded(instance, origin):
+        apply_vote_delta(instance.review_id, instance.kind, -1)
+
+
+# Activity feeds: new reviews go to the followers of the game and critic, replies to the parent's author
+@receiver(post_save, sender=Review)
+def publish_review_event(sender, instance, created, **kwargs):
+    if created:
+        publish_review(instance)
+
+
+@receiver(post_save, sender=Comment)
+def publish_reply_event(sender, instance, created, **kwargs):
+    if created and instance.parent_id:
+        publish_reply(instance)
@@ -0,0 +1,41 @@
+from django import template
+
+from core.caching import get_or_set_fragment
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_set_fragment(name, vary_on, lambda: self.nodelist.render(context))
+
+
+@register.tag('fragmentcache')
+def do_fragmentcache(parser, token):
+    """
+    Caches the enclosed template fragment under a name and a list of vary-on values,
+    recording hits and misses in core.caching.cache_stats:
+
+        {% fragmentcache "game_card" game.id game.card_version %} ... {% endfragmentcache %}
+
+    Put a version from core.caching among the vary-on values so model signals can
+    invalidate the fragment.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires at least a fragment name.")
+
+    nodelist = parser.parse(('endfragmentcache',))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -1,3 +1,580 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from game_reviews.gcloud import GoogleCloudMediaFileStorage
+
+from .caching import collection_version, get_versions, version_key
+from .catalogue import CatalogueImporter, read_records
+from .families import franchise_page, load_family
+from .feed import load_feed, pulled_event_ids
+from .models import (
+    Category, Comment, CustomUser, Event, Follow, Game, GameCategory, GamePlatform, GameTag, Platform, Review,
+    Ranking, ReviewVote, SteamStats, Tag,
+)
+from .pagination import decode_cursor, encode_cursor, paginate_keyset
+from .rankings import refresh_rankings
+from .ratings import rebuild_rating_aggregates
+from .replicas import ReplicaRouter, RoutingState, current_routing
+from .reviews import delete_user, report_review, toggle_helpful_vote
+from .search import FACETS
+from .utils import SteamSpyClient, steamspy
+
+
+def make_game(**fields):
+    defaults = {
+        'title': 'Game', 'description': '', 'developer': 'Dev', 'publisher': 'Pub',
+        'release_date': date(2020, 1, 1), 'age_rating': 12,
+    }
+    return Game.objects.create(**{**defaults, **fields})
+
+
+def make_user(username, **fields):
+    return CustomUser.objects.create_user(username=username, email=f'{username}@example.com', **fields)
+
+
+class KeysetPaginationTests(TestCase):
+    def test_cursor_keeps_microseconds(self):
+        moment = datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor([moment, 7]), 2), [moment, 7])
+
+    def test_malformed_datetime_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor([{'dt': 'not a date'}, 7]), 2)
+
+    def test_cursor_values_the_fields_cant_take(self):
+        for values in ([{'x': 1}, [2]], ['not a date', 7], [1.5, 'seven']):
+            with self.subTest(values=values), self.assertRaises(ValueError):
+                paginate_keyset(Comment.objects.all(), ('-created', '-id'), encode_cursor(values))
+
+    def test_hand_edited_cursor_is_a_bad_request(self):
+        response = self.client.get(reverse('api_games'), {'cursor': encode_cursor([{'x': 1}])})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rows_sharing_a_timestamp_are_not_skipped(self):
+        user = make_user('reader')
+        game = make_game()
+        comments = [Comment.objects.create(comment=f'#{i}', user=user, game=game) for i in range(5)]
+        Comment.objects.update(created=datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc))
+
+        seen, cursor = [], None
+        while True:
+            page = paginate_keyset(Comment.objects.all(), ('-created', '-id'), cursor, page_size=2)
+            seen.extend(comment.pk for comment in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, [comment.pk for comment in reversed(comments)])
+
+
+class ViewQueryCountTests(TestCase):
+    """
+    The game pages run a fixed number of queries, however many games, reviews
+    and comments there are.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.critic = make_user('critic', role='critic')
+        self.tag = Tag.objects.create(tag_name='RPG')
+        self.category = Category.objects.create(category_name='Single-player')
+        self.platform = Platform.objects.create(platform_name='PC')
+
+    def add_games(self, count):
+        games = [make_game(title=f'Game {i}', release_date=date(2020, 1, 1 + i % 28)) for i in range(count)]
+        for game in games:
+            GameTag.objects.create(game=game, tag=self.tag)
+            GameCategory.objects.create(game=game, category=self.category)
+            GamePlatform.objects.create(game=game, platform=self.platform)
+        return games
+
+    def add_activity(self, game, count):
+        for i in range(count):
+            user = make_user(f'{game.pk}-user{i}')
+            critic = make_user(f'{game.pk}-critic{i}', role='critic')
+            Review.objects.create(title=f'r{i}', comment='', rating=1 + i % 5, user=critic, game=game)
+            Comment.objects.create(comment=f'c{i}', user=user, game=game, status='approved')
+            make_game(title=f'DLC {i}', parent_game=game)
+
+    def test_game_list(self):
+        self.add_games(3)
+        with self.assertNumQueries(4):  # the page, then its platforms, categories and tags
+            self.client.get(reverse('game_list'))
+        self.add_games(30)
+        cache.clear()
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('game_list'))
+        self.assertTrue(response.context['page'].has_next)
+
+    def assert_detail_queries(self, cold, warm):
+        small, large = self.add_games(2)
+        self.add_activity(small, 1)
+        self.add_activity(large, 6)
+        for game in (small, large):
+            cache.clear()
+            with self.assertNumQueries(cold):
+                response = self.client.get(reverse('game_detail', args=[game.pk]))
+            self.assertEqual(response.status_code, 200)
+            # The reviews and comments fragments are cached now
+            with self.assertNumQueries(warm):
+                self.client.get(reverse('game_detail', args=[game.pk]))
+
+    def test_game_detail(self):
+        self.assert_detail_queries(cold=5, warm=2)
+
+    def test_game_detail_as_critic(self):
+        self.client.force_login(self.critic)
+        self.assert_detail_queries(cold=10, warm=7)
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        self.reader = make_user('reader')
+        self.critic = make_user('critic', role='critic')
+        self.games = [make_game(title=f'Game {i}') for i in range(4)]
+
+    def review(self, critic, game):
+        return Review.objects.create(title='r', comment='', rating=4, user=critic, game=game)
+
+    def test_pulled_events_are_merged_newest_first(self):
+        other = make_user('other', role='critic')
+        Follow.objects.create(user=self.reader, game=self.games[0], pull=True)
+        Follow.objects.create(user=self.reader, critic=self.critic, pull=True)
+        for game in self.games:
+            self.review(self.critic, game)  # the first one comes from both sources
+            self.review(other, game)
+        expected = list(
+            Event.objects.filter(Q(game=self.games[0]) | Q(actor=self.critic), kind='review')
+            .order_by('-id').values_list('id', flat=True)
+        )
+
+        self.assertEqual(pulled_event_ids(self.reader, None, 10), expected)
+        self.assertEqual(pulled_event_ids(self.reader, None, 2), expected[:2])
+        self.assertEqual(pulled_event_ids(self.reader, expected[1], 10), expected[2:])
+
+        page = load_feed(self.reader, page_size=3)
+        self.assertEqual([event.id for event in page], expected[:3])
+        self.assertEqual([event.id for event in load_feed(self.reader, page.next_cursor, 3)], expected[3:])
+
+    def test_no_popular_sources(self):
+        Follow.objects.create(user=self.reader, game=self.games[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(pulled_event_ids(self.reader, None, 10), [])
+
+
+class VoteSignalTests(TestCase):
+    def setUp(self):
+        self.game = make_game()
+        self.critic = make_user('critic', role='critic')
+        self.voters = [make_user(f'voter{i}') for i in range(6)]
+
+    def review_with_votes(self, title, votes, game=None):
+        game = game or make_game(title=title)
+        review = Review.objects.create(title=title, comment='', rating=4, user=self.critic, game=game)
+        for voter in self.voters[:votes]:
+            ReviewVote.objects.create(user=voter, review=review, kind='helpful')
+        return review
+
+    def delete_queries(self, review):
+        with CaptureQueriesContext(connection) as queries:
+            review.delete()
+        return len(queries)
+
+    def test_deleting_a_review_skips_per_vote_bookkeeping(self):
+        few = self.delete_queries(self.review_with_votes('few', 2))
+        many = self.delete_queries(self.review_with_votes('many', 6))
+        self.assertEqual(few, many)
+
+    def test_deleting_a_vote_bumps_the_votes_version(self):
+        review = self.review_with_votes('voted', 1, self.game)
+        key = version_key(self.game.pk, 'votes')
+        before = get_versions([key])[key]
+        ReviewVote.objects.get(review=review).delete()
+        self.assertNotEqual(get_versions([key])[key], before)
+
+    def test_deleting_a_voter_corrects_the_counters_in_bulk(self):
+        reviews = [self.review_with_votes('first', 2, self.game), self.review_with_votes('second', 1)]
+        ReviewVote.objects.create(user=self.voters[0], review=reviews[1], kind='report')
+        key = version_key(self.game.pk, 'votes')
+        before = get_versions([key])[key]
+        with CaptureQueriesContext(connection) as many:
+            delete_user(self.voters[0])
+        self.assertNotEqual(get_versions([key])[key], before)
+        self.assertEqual(
+            [Review.objects.values_list('helpful_votes', 'report_count').get(pk=review.pk) for review in reviews],
+            [(1, 0), (0, 0)],
+        )
+        with CaptureQueriesContext(connection) as one:
+            delete_user(self.voters[1])
+        self.assertEqual(len(many), len(one))
+
+
+@skipUnlessDBFeature('has_select_for_update')  # SQLite serializes writers, there is no race to test
+class ConcurrentVoteTests(TransactionTestCase):
+    THREADS = 8
+    TOGGLES = 25
+
+    def test_counters_match_the_vote_rows(self):
+        critic = make_user('critic', role='critic')
+        review = Review.objects.create(title='r', comment='', rating=4, user=critic, game=make_game())
+        # Two threads per user, so double-submits race too
+        users = [make_user(f'voter{i}') for i in range(self.THREADS // 2)]
+        start_line = threading.Barrier(self.THREADS)
+        errors = []
+
+        def voter(user):
+            start_line.wait()
+            try:
+                for step in range(self.TOGGLES):
+                    if step % 5 == 0:
+                        report_review(user, review)
+                    else:
+                        toggle_helpful_vote(user, review)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=voter, args=(users[i % len(users)],)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        delete_user(users[0])  # cascades the user's votes on a review that stays
+
+        review.refresh_from_db()
+        votes = ReviewVote.objects.filter(review=review)
+        self.assertEqual(review.helpful_votes, votes.filter(kind='helpful').count())
+        self.assertEqual(review.report_count, votes.filter(kind='report').count())
+        self.assertEqual(review.report_count, len(users) - 1)
+
+
+class BulkWriteVersionTests(TestCase):
+    def test_import_bumps_the_collections(self):
+        before = {name: collection_version(name) for name in ('game', 'tag', 'category', 'platform')}
+        records = [
+            {'title': 'Base', 'release_date': '2020-01-01', 'steam_app_id': 10, 'tags': ['RPG'],
+             'categories': ['Single-player'], 'platforms': ['PC']},
+            {'title': 'DLC', 'release_date': '2020-06-01', 'steam_app_id': 11, 'parent_steam_app_id': 10},
+        ]
+        CatalogueImporter().run(enumerate(records, start=1))
+        for name, version in before.items():
+            self.assertNotEqual(collection_version(name), version, name)
+
+    def test_rating_rebuild_bumps_only_changed_cards(self):
+        critic = make_user('critic', role='critic')
+        changed, unchanged = make_game(title='changed'), make_game(title='unchanged')
+        Review.objects.create(title='r', comment='', rating=5, user=critic, game=changed)
+        Game.objects.filter(pk=changed.pk).update(rating_count=0, rating_sum=0, rating_avg=0, rating_5_count=0)
+        keys = [version_key(changed.pk, 'card'), version_key(unchanged.pk, 'card')]
+        before = get_versions(keys)
+
+        self.assertEqual(rebuild_rating_aggregates(), 1)
+        after = get_versions(keys)
+        self.assertNotEqual(after[keys[0]], before[keys[0]])
+        self.assertEqual(after[keys[1]], before[keys[1]])
+        self.assertEqual(Game.objects.get(pk=changed.pk).rating_avg, 5)
+
+
+class SearchTests(TestCase):
+    def facet_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('search'), params)
+        self.assertEqual(response.status_code, 200)
+        grouped = [query for query in queries if 'GROUP BY' in query['sql']]
+        return response, len(grouped)
+
+    def test_facet_counts_are_cached_until_the_catalogue_changes(self):
+        rpg, pc = Tag.objects.create(tag_name='RPG'), Platform.objects.create(platform_name='PC')
+        games = [make_game(title=f'Game {i}', age_rating=18) for i in range(3)]
+        for game in games:
+            game.tags.add(rpg)
+        games[0].platform.add(pc)
+        params = {'tag': rpg.pk, 'platform': pc.pk, 'age_rating': 18}
+
+        response, grouped = self.facet_queries(params)
+        self.assertEqual(grouped, len(FACETS))
+        self.assertEqual(self.facet_queries(params)[1], 0)
+
+        games[1].platform.add(pc)
+        response, grouped = self.facet_queries(params)
+        self.assertEqual(grouped, len(FACETS))
+        self.assertEqual(len(response.context['games']), 2)
+        tags = next(group for group in response.context['facet_groups'] if group['name'] == 'Tag')
+        self.assertEqual([(entry['label'], entry['count']) for entry in tags['entries']], [('RPG', 2)])
+
+    @skipUnless(connection.vendor == 'postgresql', "full-text ranking needs PostgreSQL")
+    def test_text_search_ranks_by_relevance(self):
+        weak = make_game(title='Farming', description='A dragon appears once.', release_date=date(2024, 1, 1))
+        strong = make_game(title='Dragon Dragon', developer='Dragon Studio', release_date=date(2010, 1, 1))
+        middle = make_game(title='Dragon', release_date=date(2000, 1, 1))
+        make_game(title='Racing', description='No match here.')
+
+        seen, params = [], {'q': 'dragon'}
+        with mock.patch('core.views.SEARCH_PAGE_SIZE', 1):
+            while params:
+                page = self.client.get(reverse('search'), params).context['games']
+                seen.extend(game.pk for game in page)
+                params = {'q': 'dragon', 'cursor': page.next_cursor} if page.has_next else None
+        self.assertEqual(seen, [strong.pk, middle.pk, weak.pk])
+
+
+class CatalogueImportTests(TestCase):
+    def test_bad_lines_are_reported_and_skipped(self):
+        lines = StringIO(
+            '{"title": "First", "release_date": "2020-01-01"}\n'
+            '{"title": "Broken", \n'
+            '["not", "an", "object"]\n'
+            '{"title": "Last", "release_date": "2021-01-01"}\n'
+        )
+        importer = CatalogueImporter()
+        importer.run(read_records(lines, 'jsonl'))
+        self.assertEqual(importer.created, 2)
+        self.assertEqual([error.split(':')[0] for error in importer.errors], ['line 2', 'line 3'])
+        self.assertIn('invalid JSON', importer.errors[0])
+
+
+class FamilyTests(TestCase):
+    def test_moving_a_game_moves_its_dlcs(self):
+        base = make_game(title='Base')
+        other = make_game(title='Other')
+        dlc = make_game(title='DLC', parent_game=base)
+        addon = make_game(title='Add-on', parent_game=dlc)
+        dlc.parent_game = other
+        dlc.save(update_fields=['parent_game'])
+
+        family = load_family(Game.objects.get(pk=addon.pk))
+        self.assertEqual([game.title for game in family.members], ['Other', 'DLC', 'Add-on'])
+        self.assertEqual([family.base.title for family in franchise_page()], ['Other'])
+
+
+@override_settings(RANKING_SIZE=2, RANKING_PRIOR_REVIEWS=5)
+class TopRatedRefreshTests(TestCase):
+    def setUp(self):
+        self.raters = 0
+        self.games = {title: make_game(title=title) for title in 'abc'}
+        self.rate('a', 5, 5)
+        self.rate('b', 4, 4)
+        self.rate('c', 3)
+        refresh_rankings(['top_rated'])  # catalogue mean 4.2: a 4.43, b 4.14, c 4.0
+
+    def rate(self, title, *ratings):
+        for rating in ratings:
+            self.raters += 1
+            Review.objects.create(title='', comment='', rating=rating, game=self.games[title],
+                                  user=make_user(f'rater{self.raters}'))
+
+    def refresh(self):
+        with CaptureQueriesContext(connection) as queries:
+            refresh_rankings(['top_rated'])
+        top = Ranking.objects.filter(list='top_rated').order_by('position').values_list('game__title', flat=True)
+        ranked_all = any('SUM(' in query['sql'] for query in queries)
+        return list(top), ranked_all
+
+    def test_rated_games_are_rescored_against_the_stored_list(self):
+        self.rate('c', 5, 5, 5, 5, 5)  # 4.45 at the stored mean
+        self.assertEqual(self.refresh(), (['c', 'a'], False))
+        self.assertFalse(Game.objects.filter(ranking_dirty=True).exists())
+        self.assertEqual(self.refresh(), (['c', 'a'], False))
+
+    def test_a_listed_game_falling_behind_ranks_the_catalogue(self):
+        self.rate('a', 1, 1, 1)  # below b, where c could now outrank it
+        self.assertEqual(self.refresh(), (['b', 'c'], True))
+
+    def test_rebuilt_aggregates_are_rescored(self):
+        Review.objects.filter(game=self.games['c']).update(rating=5)
+        rebuild_rating_aggregates()
+        self.assertEqual(self.refresh(), (['a', 'c'], False))
+
+
+@override_settings(MEDIA_URL='https://storage.googleapis.com/bucket/uploads/')
+class MediaStorageUrlTests(SimpleTestCase):
+    def setUp(self):
+        self.storage = GoogleCloudMediaFileStorage(bucket_name='bucket', querystring_auth=False)
+
+    def test_object_name(self):
+        self.assertEqual(self.storage.url('games/images/cover.png'),
+                         'https://storage.googleapis.com/bucket/uploads/games/images/cover.png')
+
+    def test_stored_absolute_url_is_kept(self):
+        url = 'https://storage.googleapis.com/bucket/uploads/games/images/cover.png'
+        self.assertEqual(self.storage.url(url), url)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.state = RoutingState(pinned=False)
+        token = current_routing.set(self.state)
+        self.addCleanup(current_routing.reset, token)
+
+    def test_reads_go_to_a_replica(self):
+        self.assertEqual(self.router.db_for_read(Game), 'replica')
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        self.assertEqual(self.router.db_for_write(Game), 'default')
+        self.assertEqual(self.router.db_for_read(Game), 'default')
+
+
+class FakeSteamSpy:
+    """
+    A local stand-in for the SteamSpy API. Answers the queued (status, body,
+    delay) responses in order, then 200s with STATS; records when each request came.
+    """
+
+    STATS = {'positive': 90, 'negative': 10}
+
+    def __init__(self):
+        self.answers = []
+        self.request_times = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.request_times.append(time.monotonic())
+                status, body, delay = fake.answers.pop(0) if fake.answers else (200, json.dumps(fake.STATS), 0)
+                time.sleep(delay)
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body.encode())
+                except OSError:
+                    pass  # the client gave up waiting
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/api.php'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SteamSpyClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.steamspy = FakeSteamSpy()
+        cls.addClassCleanup(cls.steamspy.stop)
+
+    def setUp(self):
+        self.steamspy.answers.clear()
+        self.steamspy.request_times.clear()
+
+    def steamspy_client(self, **options):
+        options = {'timeout': (1, 1), 'rate_limit': 0, 'retries': 0, 'retry_backoff': 0, **options}
+        return SteamSpyClient(base_url=self.steamspy.url, **options)
+
+    def test_lookup_is_parsed(self):
+        info = self.steamspy_client().fetch(440)
+        self.assertEqual(info['total_reviews'], 100)
+        self.assertEqual(info['overall_score'], '90.00%')
+
+    def test_timeout_is_a_failure(self):
+        self.steamspy.answers.append((200, '{}', 0.5))
+        client = self.steamspy_client(timeout=(1, 0.1))
+        self.assertIsNone(client.fetch(440))
+        self.assertEqual(client.breaker.failures, 1)
+
+    def test_server_errors_are_retried_with_backoff(self):
+        self.steamspy.answers.extend([(503, '', 0), (503, '', 0)])
+        info = self.steamspy_client(retries=2, retry_backoff=0.1).fetch(440)
+        self.assertEqual(info['positive_reviews'], 90)
+        first, second, third = self.steamspy.request_times
+        self.assertGreaterEqual(third - second, 0.2)  # the second retry waits 2 x the backoff factor
+
+    def test_retries_are_bounded(self):
+        self.steamspy.answers.extend([(503, '', 0)] * 3)
+        client = self.steamspy_client(retries=1)
+        self.assertIsNone(client.fetch(440))
+        self.assertEqual(len(self.steamspy.request_times), 2)
+        self.assertEqual(client.breaker.failures, 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.steamspy.answers.append((404, '', 0))
+        self.assertIsNone(self.steamspy_client(retries=2).fetch(440))
+        self.assertEqual(len(self.steamspy.request_times), 1)
+
+    def test_invalid_json_is_a_failure(self):
+        self.steamspy.answers.append((200, 'not json', 0))
+        self.assertIsNone(self.steamspy_client().fetch(440))
+
+    def test_json_other_than_an_object_is_a_failure(self):
+        self.steamspy.answers.extend([(200, '[]', 0), (200, '42', 0)])
+        client = self.steamspy_client()
+        self.assertIsNone(client.fetch(440))
+        self.assertIsNone(client.fetch(440))
+        self.assertEqual(client.breaker.failures, 2)
+
+    def test_calls_are_rate_limited(self):
+        client = self.steamspy_client(rate_limit=20)
+        for app_id in range(4):
+            client.fetch(app_id)
+        times = self.steamspy.request_times
+        self.assertTrue(all(later - earlier >= 0.045 for earlier, later in zip(times, times[1:])))
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        self.steamspy.answers.extend([(500, '', 0), (500, '', 0)])
+        client = self.steamspy_client(failure_threshold=2, reset_timeout=60)
+        self.assertIsNone(client.fetch(1))
+        self.assertIsNone(client.fetch(2))
+        self.assertIsNone(client.fetch(3))
+        self.assertEqual(len(self.steamspy.request_times), 2)
+
+    @override_settings(STEAMSPY_RATE_LIMIT=1, STEAMSPY_RETRIES=2)
+    def test_zero_arguments_override_the_settings(self):
+        client = SteamSpyClient(rate_limit=0, retries=0)
+        self.assertEqual(client.rate_limiter.interval, 0)
+        self.assertEqual(client.retries, 0)
+
+
+class SteamRefreshTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.steamspy = FakeSteamSpy()
+        cls.addClassCleanup(cls.steamspy.stop)
+
+    def setUp(self):
+        self.steamspy.request_times.clear()
+
+    def test_refresh_at_a_given_rate(self):
+        games = [make_game(title=f'Game {i}', steam_app_id=100 + i % 2) for i in range(3)]
+        with override_settings(STEAMSPY_URL=self.steamspy.url):
+            call_command('steam_refresh', rate=20, stdout=StringIO())
+        times = self.steamspy.request_times
+        self.assertEqual(len(times), 2)  # one request per Steam app
+        self.assertGreaterEqual(times[1] - times[0], 0.045)
+        self.assertEqual(SteamStats.objects.filter(game__in=games, score=90).count(), 3)
+
+    def test_game_page_reads_stats_fetched_by_the_refresh(self):
+        game = make_game(steam_app_id=440)
+        stale = make_game(title='Stale', steam_app_id=441)
+        SteamStats.objects.create(game=stale, positive_reviews=1, negative_reviews=1, score=50,
+                                  fetched_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+        url = reverse('game_detail', args=[game.pk])
+        with override_settings(STEAMSPY_URL=self.steamspy.url), mock.patch.object(steamspy, 'base_url', self.steamspy.url):
+            self.assertContains(self.client.get(url), 'No Steam stats yet')
+            self.assertEqual(self.steamspy.request_times, [])
+            call_command('steam_refresh', missing=True, rate=0, stdout=StringIO())
+        self.assertEqual(len(self.steamspy.request_times), 1)  # the stale snapshot is left for the nightly run
+        self.assertContains(self.client.get(url), '90.00%')
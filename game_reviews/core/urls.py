@@ -1,6 +1,6 @@
 # core/urls.py
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -10,10 +10,16 @@ urlpatterns = [
     path('account/<int:user_id>/', views.account_details, name='account_details'),
     path('game/<int:game_id>/', views.game_detail, name='game_detail'),
     path('games/', views.game_list, name='game_list'),
+    path('franchises/', views.franchise_list, name='franchise_list'),
+    path('search/', views.search, name='search'),
     path('game/create/', views.create_game, name='create_game'),
     path('game/edit/<int:game_id>', views.edit_game, name='edit_game'),
     path('game/delete/<int:game_id>', views.delete_game, name='delete_game'),
     path('comment/<int:comment_id>/delete/', views.delete_comment, name='delete_comment'),
+    path('comment/<int:comment_id>/like/', views.like_comment, name='like_comment'),
+    path('moderation/', views.moderation_queue, name='moderation_queue'),
+    path('moderation/comments/', views.bulk_moderate_comments, name='bulk_moderate_comments'),
+    path('moderation/reviews/', views.bulk_moderate_reviews, name='bulk_moderate_reviews'),
     path('critic/edit/', views.edit_critic, name='edit_critic'),
     path('critic/delete/', views.delete_critic, name='delete_critic'),
     path('critic/delete_confirm/', views.delete_critic_confirm, name='delete_critic_confirm'), 
@@ -21,7 +27,21 @@ urlpatterns = [
     path('critic/dashboard/', views.critic_dashboard, name='critic_dashboard'),
     path('game/<int:game_id>/all_reviews/', views.all_reviews, name='all_reviews'),
     path('game/<int:game_id>/create_review/', views.create_review, name='create_review'),
+    path('review/<int:review_id>/helpful/', views.vote_review_helpful, name='vote_review_helpful'),
+    path('review/<int:review_id>/report/', views.report_review_view, name='report_review'),
+    path('game/<int:game_id>/follow/', views.follow_game, name='follow_game'),
+    path('critic/<int:critic_id>/follow/', views.follow_critic, name='follow_critic'),
+    path('feed/', views.feed, name='feed'),
     path('adminas/user_list/', views.user_list, name='user_list'),
     path('adminas/update_role/<int:user_id>/', views.update_user_role, name='update_user_role'),
+    path('adminas/cache_stats/', views.cache_stats_view, name='cache_stats'),
+    path('metrics', views.metrics, name='metrics'),
+    path('api/games/', api.games, name='api_games'),
+    path('api/games/<int:game_id>/', api.game, name='api_game'),
+    path('api/games/<int:game_id>/reviews/', api.game_reviews, name='api_game_reviews'),
+    path('api/games/<int:game_id>/comments/', api.game_comments, name='api_game_comments'),
+    path('api/tags/', api.tags, name='api_tags'),
+    path('api/categories/', api.categories, name='api_categories'),
+    path('api/platforms/', api.platforms, name='api_platforms'),
     path('upload/', views.upload_file, name='upload_file'),
 ]
@@ -1,4 +1,16 @@
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
 from django.core.files.storage import default_storage
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import track
+
+logger = logging.getLogger(__name__)
 
 
 def upload_to_storage(file):
@@ -15,34 +27,156 @@ def upload_to_storage(file):
         raise ValueError(f"Failed to upload file: {e}")
 
 
-import requests
+class CircuitBreaker:
+    """
+    Stops calling an upstream after `failure_threshold` consecutive failures and
+    lets a single trial request through once `reset_timeout` seconds have passed.
+    """
 
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Half-open: let this caller probe, keep everyone else out
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1 / `rate` seconds apart across all threads sharing it.
+    A rate of None or 0 disables limiting.
+    """
 
-def get_game_info(app_id):
-    # Fetch game details from Steam API
-    # Fetch review counts and score from SteamSpy API
-    steamspy_url = f"https://steamspy.com/api.php?request=appdetails&appid={app_id}"
-    steamspy_response = requests.get(steamspy_url)
+    def __init__(self, rate=None):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def configured(value, setting, default):
+    # An explicit argument, even 0, wins over the setting
+    return getattr(settings, setting, default) if value is None else value
+
+
+class SteamSpyClient:
+    """
+    SteamSpy appdetails client with a pooled session, strict timeouts, bounded
+    retries and a circuit breaker so a slow SteamSpy can't tie up the workers
+    of `manage.py steam_refresh`, its only caller.
+    The client talks to a single host, so its rate limiter is the per-host limit.
+    """
+
+    def __init__(self, base_url=None, timeout=None, failure_threshold=None, reset_timeout=None, rate_limit=None, retries=None, retry_backoff=None):
+        self.base_url = configured(base_url, 'STEAMSPY_URL', 'https://steamspy.com/api.php')
+        self.timeout = configured(timeout, 'STEAMSPY_TIMEOUT', (2, 3))
+        self.breaker = CircuitBreaker(
+            configured(failure_threshold, 'STEAMSPY_FAILURE_THRESHOLD', 5),
+            configured(reset_timeout, 'STEAMSPY_RESET_TIMEOUT', 60),
+        )
+        self.rate_limiter = RateLimiter(configured(rate_limit, 'STEAMSPY_RATE_LIMIT', None))
+        self.retries = configured(retries, 'STEAMSPY_RETRIES', 0)
+        self.retry_backoff = configured(retry_backoff, 'STEAMSPY_RETRY_BACKOFF', 0)
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=20, max_retries=self.retry_policy())
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def retry_policy(self):
+        """
+        Retries connection errors, timeouts and 429/5xx answers, the second and
+        later ones after an exponential backoff. Retry-After is ignored so a
+        call's duration stays bounded by the timeouts and the backoff.
+        """
+        return Retry(
+            total=self.retries,
+            backoff_factor=self.retry_backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods={'GET'},
+            respect_retry_after_header=False,
+            raise_on_status=False,  # the last answer goes through raise_for_status()
+        )
+
+    @staticmethod
+    def parse(review_data):
+        if not isinstance(review_data, dict):
+            raise ValueError(f"Expected a JSON object, got {type(review_data).__name__}")
+        positive_reviews = review_data.get("positive", 0)
+        negative_reviews = review_data.get("negative", 0)
+        total_reviews = positive_reviews + negative_reviews
+        overall_score = (positive_reviews / total_reviews) * 100 if total_reviews > 0 else 0
 
-    if steamspy_response.status_code != 200:
-        print("Failed to retrieve review data from SteamSpy.")
         return {
-            "positive_reviews": "Unavailable",
-            "negative_reviews": "Unavailable",
-            "total_reviews": "Unavailable",
-            "overall_score": "Unavailable"
+            "positive_reviews": positive_reviews,
+            "negative_reviews": negative_reviews,
+            "total_reviews": total_reviews,
+            "overall_score": f"{overall_score:.2f}%"
         }
 
-    review_data = steamspy_response.json()
+    def fetch(self, app_id):
+        """
+        Returns the parsed stats, or None if the call failed or the breaker is open.
+        """
+        if not self.breaker.allow_request():
+            return None
+
+        self.rate_limiter.wait()
+        try:
+            with track('http'):
+                response = self.session.get(
+                    self.base_url,
+                    params={'request': 'appdetails', 'appid': app_id},
+                    timeout=self.timeout,
+                )
+            response.raise_for_status()
+            info = self.parse(response.json())
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Failed to retrieve review data from SteamSpy for app %s: %s", app_id, e)
+            self.breaker.record_failure()
+            return None
+
+        self.breaker.record_success()
+        return info
 
-    positive_reviews = review_data.get("positive", 0)
-    negative_reviews = review_data.get("negative", 0)
-    total_reviews = positive_reviews + negative_reviews
-    overall_score = (positive_reviews / total_reviews) * 100 if total_reviews > 0 else 0
 
-    return {
-        "positive_reviews": positive_reviews,
-        "negative_reviews": negative_reviews,
-        "total_reviews": total_reviews,
-        "overall_score": f"{overall_score:.2f}%"
-    }
+steamspy = SteamSpyClient()
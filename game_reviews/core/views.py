@@ -1,17 +1,60 @@
+import logging
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.views.decorators.http import require_POST
 from .forms import CustomUserCreationForm, GameForm, CustomUserEditForm, CommentForm, ReviewForm, RoleChangeForm, FileUploadForm
-from .models import Game, Review, Comment, CustomUser
-from .utils import get_game_info, upload_to_storage
+from .models import Game, Review, Comment, CustomUser, SteamStats
+from .caching import attach_versions, cache_stats, game_version
+from .comments import load_comment_tree, toggle_like
+from .critic_stats import critic_reviews, critic_stats
+from .families import franchise_page, load_family
+from .feed import is_following, load_feed, toggle_follow
+from .metrics import registry
+from .moderation import MODERATION_ACTIONS, moderate_comments, moderate_reviews, pending_comments, reported_reviews
+from .pagination import paginate_keyset
+from .rankings import load_rankings
+from .reviews import delete_user, report_review, toggle_helpful_vote, user_votes
+from .search import FACET_LABELS, FACETS, RANK_ORDERING, cached_facet_counts, filter_games, is_ranked
+from .utils import upload_to_storage
+
+logger = logging.getLogger(__name__)
+
+GAME_LIST_PAGE_SIZE = 24
+
+# Entries shown per ranked list on the home page
+HOME_RANKING_SIZE = 10
+
+# Orderings available on the game list, each ending in the pk so keyset paging is stable
+GAME_LIST_ORDERINGS = {
+    'release': ('-release_date', '-id'),
+    'newest': ('-id',),
+}
+
+SEARCH_PAGE_SIZE = 24
+
+# Facets whose values are ids or numbers in the query string
+NUMERIC_FACETS = ('tag', 'category', 'platform', 'age_rating')
 
 
 def home(request):
-    latest_games = Game.objects.order_by('-id')[:10]  # Fetch the latest 10 games
-    return render(request, 'core/home.html', {'latest_games': latest_games})
+    latest_games = list(Game.objects.order_by('-id')[:10])  # Fetch the latest 10 games
+    # Ranked lists are precomputed by `manage.py refresh_rankings`
+    rankings = load_rankings(HOME_RANKING_SIZE)
+    ranked_games = [entry.game for entries in rankings.values() for entry in entries]
+    attach_versions(latest_games + ranked_games, 'card')
+    context = {
+        'latest_games': latest_games,
+        'top_rated': rankings['top_rated'],
+        'trending': rankings['trending'],
+        'most_helpful': rankings['most_helpful'],
+    }
+    return render(request, 'core/home.html', context)
 
 
 def register(request):
@@ -61,6 +104,7 @@ def user_logout(request):
 def account_details(request, user_id):
     user = CustomUser.objects.get(id=user_id)
     is_critic = user.role == 'critic'
+    following = is_critic and user != request.user and is_following(request.user, critic=user)
 
     # Check if the logged-in user is an admin
     if request.user.role == 'admin':
@@ -76,12 +120,14 @@ def account_details(request, user_id):
         context = {
             'user': user,
             'is_critic': is_critic,
+            'is_following': following,
             'form': form,
         }
     else:
         context = {
             'user': user,
             'is_critic': is_critic,
+            'is_following': following,
         }
 
     return render(request, 'core/account_details.html', context)
@@ -91,8 +137,17 @@ def account_details(request, user_id):
 def critic_dashboard(request):
     if request.user.role != 'critic':
         return redirect('home')
-    reviews = Review.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'core/critic_dashboard.html', {'reviews': reviews})
+
+    try:
+        reviews = critic_reviews(request.user, request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    context = {
+        **critic_stats(request.user),
+        'reviews': reviews,
+    }
+    return render(request, 'core/critic_dashboard.html', context)
 
 
 @login_required
@@ -124,7 +179,7 @@ def delete_critic_confirm(request):
         return HttpResponseForbidden("You are not authorized to delete this profile.")
 
     # Delete the critic's account
-    request.user.delete()
+    delete_user(request.user)
     return redirect('home')  # Redirect to the homepage or another appropriate page
 
 
@@ -135,60 +190,75 @@ def verify_critic(request):
     return render(request, 'core/verify_critic.html')
 
 
-def game_detail(request, game_id):
-    game = get_object_or_404(Game, id=game_id)
-    steam_info = get_game_info(game.steam_app_id)
-
-    # Check if the game is a DLC or a base game
-    if game.parent_game:
-        parent_game = game.parent_game
-        dlcs = []
-    else:
-        parent_game = None
-        dlcs = Game.objects.filter(parent_game=game)
+def stored_steam_stats(game):
+    """
+    The game's Steam snapshot, loaded with select_related, or None until
+    `manage.py steam_refresh` has fetched it; pages never call SteamSpy.
+    """
+    try:
+        return game.steam_stats
+    except SteamStats.DoesNotExist:
+        return None
+
+
+def post_comment(request, game):
+    """
+    Handles a comment submission. Returns (response, form); response is None
+    when the form is invalid and the page should be re-rendered with its errors.
+    """
+    if not request.user.is_authenticated:
+        return redirect('login'), None
+
+    comment_form = CommentForm(request.POST)
+    if comment_form.is_valid():
+        new_comment = comment_form.save(commit=False)
+        if new_comment.parent and new_comment.parent.game_id != game.id:
+            return HttpResponseBadRequest("Cannot reply to a comment on another game."), comment_form
+        new_comment.user = request.user
+        new_comment.game = game
+        new_comment.save()
+        return redirect('game_detail', game_id=game.id), comment_form
+    return None, comment_form
 
-    # Fetch the latest two reviews
-    latest_reviews = game.reviews.order_by('-created_at')[:2]
 
-    # Check if the user is a critic and has reviewed
-    is_critic = request.user.is_authenticated and request.user.role == 'critic'
-    user_has_reviewed = False
-    user_review = None
-    if is_critic:
-        try:
-            user_review = Review.objects.get(game=game, user=request.user)
-            user_has_reviewed = True
-        except Review.DoesNotExist:
-            pass
-
-    # Fetch top-level comments (comments without a parent)
-    comments = Comment.objects.filter(game=game, parent__isnull=True).select_related('user')
+def game_detail(request, game_id):
+    game = get_object_or_404(Game.objects.select_related('steam_stats'), id=game_id)
+    user = request.user
 
     comment_form = CommentForm()
 
     # Handle comment submission
     if request.method == 'POST':
-        if request.user.is_authenticated:
-            comment_form = CommentForm(request.POST)
-            if comment_form.is_valid():
-                new_comment = comment_form.save(commit=False)
-                new_comment.user = request.user
-                new_comment.game = game
-                new_comment.save()
-                return redirect('game_detail', game_id=game.id)
-        else:
-            return redirect('login')
+        response, comment_form = post_comment(request, game)
+        if response is not None:
+            return response
+
+    # Check if the user is a critic and has reviewed
+    is_critic = user.is_authenticated and user.role == 'critic'
+    user_review = Review.objects.filter(game=game, user=user).first() if is_critic else None
+    steam_stats = stored_steam_stats(game)
+
+    try:
+        comments = load_comment_tree(game, request.GET.get('comments'), user=user)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    # Left lazy: only queried when the cached reviews fragment is stale
+    latest_reviews = game.reviews.exclude(status='hidden').select_related('user').order_by('-created_at')[:2]
 
     context = {
         'game': game,
-        'steam_info': steam_info,
+        'steam_stats': steam_stats,
         'latest_reviews': latest_reviews,
+        'reviews_version': game_version(game.id, 'reviews'),
+        'family': load_family(game),  # The base game, its DLCs and the family-wide rating
         'is_critic': is_critic,
-        'user_has_reviewed': user_has_reviewed,
+        'user_has_reviewed': user_review is not None,
         'user_review': user_review,
-        'comments': comments,  # Pass top-level comments
+        'is_following': is_following(user, game=game),
+        'comments': comments,  # Top-level comments, replies in comment.children
         'comment_form': comment_form,
-        'error_message': 'Steam information not available' if not steam_info else None,
+        'error_message': None if steam_stats else ('No Steam stats yet' if game.steam_app_id else 'Not on Steam'),
     }
     return render(request, 'core/game.html', context)
 
@@ -206,21 +276,18 @@ def create_game(request):
                 # Save the form and upload the file
                 game = form.save()
 
-                # Debugging: Log the uploaded file URL
-                if game.image:  # Assuming `image` is the upload field
-                    print(f"File uploaded to: {game.image.url}")
+                if game.image:
+                    logger.info("Game %s image uploaded to %s", game.pk, game.image.name)
 
                 # Redirect to the home page after successful save
                 return redirect('home')
-            except Exception as e:
-                # Log the exception for debugging
-                print(f"Error during file upload: {e}")
+            except Exception:
+                logger.exception("Failed to save game or upload its files")
 
                 # Optionally, return a JSON response with error details
                 return JsonResponse({'error': 'An error occurred while saving the game or uploading the file.'}, status=500)
         else:
-            # If form validation fails, log errors
-            print(f"Form errors: {form.errors}")
+            logger.info("Invalid game form: %s", form.errors.as_json())
 
     else:
         # Initialize a blank form for GET requests
@@ -236,7 +303,7 @@ def edit_game(request, game_id):
 
     game = get_object_or_404(Game, id=game_id)
     if request.method == 'POST':
-        form = GameForm(request.POST, instance=game)
+        form = GameForm(request.POST, request.FILES, instance=game)
         if form.is_valid():
             form.save()
             return redirect('game_detail', game_id=game.id)
@@ -261,8 +328,78 @@ def delete_game(request, game_id):
 
 
 def game_list(request):
-    games = Game.objects.all()  # Fetch all games from the database
-    return render(request, 'core/game_list.html', {'games': games})
+    sort = request.GET.get('sort')
+    if sort not in GAME_LIST_ORDERINGS:
+        sort = 'release'
+
+    games = Game.objects.prefetch_related('platform', 'category', 'tags')
+    try:
+        page = paginate_keyset(games, GAME_LIST_ORDERINGS[sort], request.GET.get('cursor'), GAME_LIST_PAGE_SIZE)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    attach_versions(page, 'card')
+    return render(request, 'core/game_list.html', {'games': page, 'page': page, 'sort': sort})
+
+
+def franchise_list(request):
+    try:
+        families = franchise_page(request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+    return render(request, 'core/franchise_list.html', {'families': families})
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    filters = {facet: request.GET.getlist(facet) for facet in FACETS}
+    for facet in NUMERIC_FACETS:
+        filters[facet] = [value for value in filters[facet] if value.isdigit()]
+
+    games = filter_games(Game.objects.all(), query, filters)
+    facets = cached_facet_counts(query, filters)
+
+    try:
+        page = paginate_keyset(
+            games.prefetch_related('platform', 'category', 'tags'),
+            RANK_ORDERING if is_ranked(query) else GAME_LIST_ORDERINGS['release'],
+            request.GET.get('cursor'),
+            SEARCH_PAGE_SIZE,
+        )
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+    attach_versions(page, 'card')
+
+    # Each facet value links to the current search with that value toggled
+    facet_groups = []
+    for facet, entries in facets.items():
+        for entry in entries:
+            params = request.GET.copy()
+            params.pop('cursor', None)
+            values = params.getlist(facet)
+            entry['selected'] = entry['value'] in values
+            if entry['selected']:
+                values.remove(entry['value'])
+            else:
+                values.append(entry['value'])
+            params.setlist(facet, values)
+            entry['url'] = params.urlencode()
+        facet_groups.append({'name': FACET_LABELS[facet], 'entries': entries})
+
+    next_params = None
+    if page.has_next:
+        next_params = request.GET.copy()
+        next_params['cursor'] = page.next_cursor
+        next_params = next_params.urlencode()
+
+    context = {
+        'query': query,
+        'filters': filters,
+        'games': page,
+        'facet_groups': facet_groups,
+        'next_params': next_params,
+    }
+    return render(request, 'core/search.html', context)
 
 
 @login_required
@@ -276,10 +413,159 @@ def delete_comment(request, comment_id):
         return HttpResponseForbidden("You don't have permission to delete this comment.")
 
 
+@login_required
+def moderation_queue(request):
+    if request.user.role != 'moderator':
+        return HttpResponseForbidden("You don't have permission to moderate.")
+
+    try:
+        reviews = reported_reviews(request.GET.get('reviews'))
+        comments = pending_comments(request.GET.get('comments'))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    # Each list pages on its own cursor, keeping the other list where it is
+    next_params = {}
+    for name, page in (('reviews', reviews), ('comments', comments)):
+        if page.has_next:
+            params = request.GET.copy()
+            params[name] = page.next_cursor
+            next_params[name] = params.urlencode()
+
+    context = {
+        'reviews': reviews,
+        'comments': comments,
+        'next_reviews': next_params.get('reviews'),
+        'next_comments': next_params.get('comments'),
+        'actions': MODERATION_ACTIONS,
+    }
+    return render(request, 'core/moderation_queue.html', context)
+
+
+def run_bulk_moderation(request, queryset, moderate, noun):
+    """
+    Applies the posted action to the ticked objects, or to everything one user
+    posted (e.g. a spam account after a raid), then returns to the queue.
+    """
+    if request.user.role != 'moderator':
+        return HttpResponseForbidden("You don't have permission to moderate.")
+
+    action = request.POST.get('action')
+    if action not in MODERATION_ACTIONS:
+        return HttpResponseBadRequest("Unknown moderation action.")
+    try:
+        if request.POST.get('user'):
+            queryset = queryset.filter(user_id=int(request.POST['user']))
+        else:
+            queryset = queryset.filter(id__in=[int(value) for value in request.POST.getlist('ids')])
+    except ValueError:
+        return HttpResponseBadRequest("Invalid selection.")
+
+    changed = moderate(queryset, action)
+    messages.success(request, f"{MODERATION_ACTIONS[action]} {changed} {noun}.")
+    return redirect('moderation_queue')
+
+
+@login_required
+@require_POST
+def bulk_moderate_comments(request):
+    return run_bulk_moderation(request, Comment.objects.all(), moderate_comments, 'comments')
+
+
+@login_required
+@require_POST
+def bulk_moderate_reviews(request):
+    return run_bulk_moderation(request, Review.objects.all(), moderate_reviews, 'reviews')
+
+
+@login_required
+@require_POST
+def like_comment(request, comment_id):
+    comment = get_object_or_404(Comment.objects.only('id', 'game_id'), id=comment_id)
+    liked = toggle_like(request.user, comment)
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        like_count = Comment.objects.filter(id=comment.id).values_list('like_count', flat=True).first()
+        return JsonResponse({'liked': liked, 'like_count': like_count})
+    return redirect('game_detail', game_id=comment.game_id)
+
+
 def all_reviews(request, game_id):
     game = get_object_or_404(Game, id=game_id)
-    reviews = game.reviews.order_by('-created_at')
-    return render(request, 'core/all_reviews.html', {'game': game, 'reviews': reviews})
+    # Not fragment-cached: the vote counts and the user's own votes change with every vote
+    reviews = list(game.reviews.exclude(status='hidden').select_related('user').order_by('-created_at'))
+    votes = user_votes(request.user, [review.id for review in reviews])
+    for review in reviews:
+        review.voted_helpful = (review.id, 'helpful') in votes
+        review.reported = (review.id, 'report') in votes
+    context = {
+        'game': game,
+        'reviews': reviews,
+    }
+    return render(request, 'core/all_reviews.html', context)
+
+
+def review_vote_response(request, review, **data):
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        counts = Review.objects.filter(id=review.id).values('helpful_votes', 'report_count').first()
+        return JsonResponse({**data, **counts})
+    return redirect('all_reviews', game_id=review.game_id)
+
+
+@login_required
+@require_POST
+def vote_review_helpful(request, review_id):
+    review = get_object_or_404(Review.objects.only('id', 'game_id', 'user_id'), id=review_id)
+    if review.user_id == request.user.id:
+        return HttpResponseForbidden("You can't vote on your own review.")
+
+    voted = toggle_helpful_vote(request.user, review)
+    return review_vote_response(request, review, voted=voted)
+
+
+@login_required
+@require_POST
+def report_review_view(request, review_id):
+    review = get_object_or_404(Review.objects.only('id', 'game_id', 'user_id'), id=review_id)
+    if review.user_id == request.user.id:
+        return HttpResponseForbidden("You can't report your own review.")
+
+    report_review(request.user, review)
+    return review_vote_response(request, review, reported=True)
+
+
+def follow_response(request, following, redirect_to, **kwargs):
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'following': following})
+    return redirect(redirect_to, **kwargs)
+
+
+@login_required
+@require_POST
+def follow_game(request, game_id):
+    game = get_object_or_404(Game.objects.only('id'), id=game_id)
+    following = toggle_follow(request.user, game=game)
+    return follow_response(request, following, 'game_detail', game_id=game.id)
+
+
+@login_required
+@require_POST
+def follow_critic(request, critic_id):
+    critic = get_object_or_404(CustomUser.objects.only('id'), id=critic_id, role='critic')
+    if critic.id == request.user.id:
+        return HttpResponseForbidden("You can't follow yourself.")
+
+    following = toggle_follow(request.user, critic=critic)
+    return follow_response(request, following, 'account_details', user_id=critic.id)
+
+
+@login_required
+def feed(request):
+    try:
+        events = load_feed(request.user, request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+    return render(request, 'core/feed.html', {'events': events})
 
 
 @login_required
@@ -288,6 +574,10 @@ def create_review(request, game_id):
         return HttpResponseForbidden("You are not authorized to create reviews.")
 
     game = get_object_or_404(Game, id=game_id)
+    if Review.objects.filter(game=game, user=request.user).exists():
+        messages.error(request, "You have already reviewed this game.")
+        return redirect('game_detail', game_id=game.id)
+
     if request.method == 'POST':
         form = ReviewForm(request.POST)
         if form.is_valid():
@@ -343,6 +633,21 @@ def update_user_role(request, user_id):
     return render(request, 'core/update_user_role.html', {'form': form, 'user': user})
 
 
+@login_required
+def cache_stats_view(request):
+    if request.user.role != 'admin':
+        return HttpResponseForbidden("You are not authorized to access this page.")
+    return JsonResponse(cache_stats.snapshot())
+
+
+def metrics(request):
+    # Scraped by Prometheus from an allowed address; admins can look at it in the browser
+    allowed = request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    if not (allowed or (request.user.is_authenticated and request.user.role == 'admin')):
+        return HttpResponseForbidden("You are not authorized to access this page.")
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 def upload_file(request):
     if request.method == "POST":
         form = FileUploadForm(request.POST, request.FILES)
@@ -359,4 +664,4 @@ def upload_file(request):
     else:
         form = FileUploadForm()
 
-    return render(request, 'upload_file.html', {'form': form})
+    return render(request, 'core/upload_file.html', {'form': form})
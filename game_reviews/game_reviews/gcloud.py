@@ -1,24 +1,89 @@
-from storages.backends.gcloud import GoogleCloudStorage
-from urllib.parse import urljoin
+import mimetypes
+import os
+from urllib.parse import urljoin, urlsplit
+
 from django.conf import settings
+from google.api_core.exceptions import PreconditionFailed
+from google.cloud.storage.retry import DEFAULT_RETRY
+from storages.backends.gcloud import GoogleCloudStorage
+from storages.utils import clean_name, get_available_overwrite_name
+
+
+def load_credentials():
+    """
+    Loads the service-account key on first use, so settings import without it.
+    Returns None, i.e. application default credentials, when no key file exists.
+    """
+    path = os.path.join(settings.BASE_DIR, settings.GOOGLE_CREDENTIALS_PATH)
+    if not os.path.exists(path):
+        return None
+
+    from google.oauth2 import service_account
+    return service_account.Credentials.from_service_account_file(path)
 
 
 class GoogleCloudMediaFileStorage(GoogleCloudStorage):
-    """Custom Google Cloud Storage backend that respects GS_LOCATION."""
+    """
+    Google Cloud Storage backend for uploaded media.
+
+    Objects are readable through bucket-level access (or signed URLs with
+    GS_QUERYSTRING_AUTH), so there are no per-object ACL calls, and an upload
+    is a single request: instead of checking that the name is free first, the
+    upload only succeeds if no object exists under that name yet.
+    """
+
+    @property
+    def client(self):
+        if self._client is None and self.credentials is None:
+            self.credentials = load_credentials()
+        return super().client
+
+    def get_available_name(self, name, max_length=None):
+        # Collisions are caught by the upload's precondition instead of an exists() call
+        return get_available_overwrite_name(name, max_length)
 
     def _save(self, name, content):
-        # Ensure the path starts with GS_LOCATION
-        if not name.startswith(settings.GS_LOCATION):
-            name = f"{settings.GS_LOCATION}/{name.lstrip('/')}"  # Add GS_LOCATION
-        print(f"Uploading file to: {name}")  # Debugging
-        name = super()._save(name, content)
-
-        # Make the file public
-        blob = self.bucket.blob(name)
-        blob.make_public()
-        print(f"File public URL: {blob.public_url}")
-        return name
-
-    def url(self, name):
-        # Ensure URLs include MEDIA_URL as root
-        return urljoin(settings.MEDIA_URL, name.lstrip('/'))
+        while True:
+            try:
+                return self._upload(name, content)
+            except PreconditionFailed:
+                if self.file_overwrite:
+                    raise
+                name = self.get_alternative_name(*os.path.splitext(name))
+
+    def _upload(self, name, content):
+        cleaned_name = clean_name(name)
+        content.name = cleaned_name
+        # bucket.blob() is local; GoogleCloudFile would fetch the blob's metadata first
+        blob = self.bucket.blob(self._normalize_name(cleaned_name), chunk_size=self.blob_chunk_size)
+
+        mime_type, mime_encoding = mimetypes.guess_type(cleaned_name)
+        blob_params = self.get_object_parameters(cleaned_name)
+        predefined_acl = blob_params.pop('acl', self.default_acl)
+        content_type = blob_params.pop('content_type', mime_type)
+        if mime_encoding and 'content_encoding' not in blob_params:
+            blob_params['content_encoding'] = mime_encoding
+        if self.gzip and content_type in self.gzip_content_types and 'content_encoding' not in blob_params:
+            content = self._compress_content(content)
+            blob_params['content_encoding'] = 'gzip'
+        for prop, value in blob_params.items():
+            setattr(blob, prop, value)
+
+        blob.upload_from_file(
+            content,
+            rewind=True,
+            size=getattr(content, 'size', None),
+            content_type=content_type,
+            predefined_acl=predefined_acl,
+            if_generation_match=None if self.file_overwrite else 0,
+            retry=DEFAULT_RETRY,
+        )
+        return cleaned_name
+
+    def url(self, name, parameters=None):
+        if urlsplit(name).scheme in ('http', 'https'):
+            return name  # stored as a full URL by older versions of the game form
+        if self.querystring_auth:
+            return super().url(name, parameters)
+        # Public objects: build the URL locally, without a client or credentials
+        return urljoin(settings.MEDIA_URL, clean_name(name).lstrip('/'))
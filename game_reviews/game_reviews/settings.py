@@ -12,8 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 import os
 from pathlib import Path
-from decouple import config
-from google.oauth2 import service_account
+from decouple import Csv, config
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -35,11 +34,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Full-text search for the game search page
     'core',  # Your app
     'storages',  # Required for Google Cloud Storage integration
 ]
 
 MIDDLEWARE = [
+    'core.metrics.RequestMetricsMiddleware',  # first, so it times the whole stack
+    'core.replicas.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +56,8 @@ ROOT_URLCONF = 'game_reviews.urls'
 # Templates
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, with render times reported by core.metrics
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'game_reviews' / 'core' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,18 +73,87 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'game_reviews.wsgi.application'
 
+# Request instrumentation (core.metrics): Server-Timing headers, a slow-request log and
+# a Prometheus /metrics endpoint, readable from these addresses or by admins
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+SLOW_REQUEST_THRESHOLD = config('SLOW_REQUEST_THRESHOLD', default=1.0, cast=float)  # seconds
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1', cast=Csv())
+
 # Database Configuration
-DATABASES = {
+# DB_ENGINE=sqlite uses a local file instead, e.g. to run bench_views without a server
+if config('DB_ENGINE', default='postgresql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'TEST': {'MIGRATE': False},  # the app ships without migrations; tables come from the models
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME'),
+            'USER': config('DB_USER'),
+            'PASSWORD': config('DB_PASSWORD'),
+            'HOST': config('DB_HOST'),
+            'PORT': config('DB_PORT'),
+            # Keep connections open across requests instead of reconnecting every time, and
+            # check a reused connection is still alive before the request that picks it up
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'TEST': {'MIGRATE': False},  # the app ships without migrations; tables come from the models
+        }
+    }
+
+# Read replicas (core.replicas): request reads are spread over them, everything else uses
+# 'default'. Postgres replicas are given as host[:port] (same credentials as the primary),
+# SQLite ones as file paths; e.g. DB_ENGINE=sqlite DB_REPLICAS=db_replica.sqlite3 with a copy
+# of db.sqlite3 tries the routing locally. Tests use the primary for every alias.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    alias = f'replica{index}'
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias] = {**DATABASES['default'], 'NAME': BASE_DIR / replica}
+    else:
+        host, _, port = replica.partition(':')
+        DATABASES[alias] = {**DATABASES['default'], 'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+READ_YOUR_WRITES_SECONDS = config('READ_YOUR_WRITES_SECONDS', default=5, cast=int)
+
+# Cache (local memory by default, which is also what tests use)
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': config('DB_NAME'),
-        'USER': config('DB_USER'),
-        'PASSWORD': config('DB_PASSWORD'),
-        'HOST': config('DB_HOST'),
-        'PORT': config('DB_PORT'),
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='game-reviews'),
     }
 }
 
+FRAGMENT_CACHE_TIMEOUT = 60 * 60  # versioned keys are invalidated by signals, this only bounds memory
+CRITIC_STATS_TIMEOUT = 5 * 60  # votes and comments on a critic's reviews reach their dashboard stats within this
+
+# Ranked lists on the home page (core.rankings), refreshed by `manage.py refresh_rankings`
+RANKING_SIZE = 20  # entries stored per list
+RANKING_PRIOR_REVIEWS = 5  # weight of the catalogue mean in the Bayesian average, in reviews
+RANKING_MAX_DIRTY = 1000  # above this many games rated since the last refresh, top rated is ranked in full
+TRENDING_DAYS = 7  # activity window of the trending list
+
+# Activity feeds (core.feed): events of a game or critic with this many followers are
+# read at feed time instead of being copied into every follower's feed
+FEED_FANOUT_LIMIT = config('FEED_FANOUT_LIMIT', default=1000, cast=int)
+
+# SteamSpy Client
+STEAMSPY_URL = config('STEAMSPY_URL', default='https://steamspy.com/api.php')
+STEAMSPY_TIMEOUT = (2, 3)  # (connect, read) seconds
+STEAMSPY_FAILURE_THRESHOLD = 5  # consecutive failures before the circuit opens
+STEAMSPY_RESET_TIMEOUT = 60  # seconds before a trial request is let through
+STEAMSPY_RATE_LIMIT = 1  # requests per second to the SteamSpy host (their documented poll rate); see steam_refresh --rate
+STEAMSPY_RETRIES = 2  # retries of a failed call (connection errors, timeouts, 429/5xx)
+STEAMSPY_RETRY_BACKOFF = 0.5  # backoff factor: the first retry is immediate, the next ones wait 1s, 2s...
+
 # Password Validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -99,30 +171,49 @@ USE_TZ = True
 # Static Files
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
-
-# DEFAULT_FILE_STORAGE = 'storages.backends.gcloud.GoogleCloudStorage'
-DEFAULT_FILE_STORAGE = 'game_reviews.gcloud.GoogleCloudMediaFileStorage'
+STATIC_ROOT = BASE_DIR / 'staticfiles'  # collectstatic output, served by WhiteNoise in production
+
+# Media storage: 'gcs' in production, 'local' (files under MEDIA_ROOT) or 'memory' for
+# development, tests and benchmarks that must run offline
+MEDIA_STORAGE = config('MEDIA_STORAGE', default='gcs')
+MEDIA_STORAGE_BACKENDS = {
+    'gcs': 'game_reviews.gcloud.GoogleCloudMediaFileStorage',
+    'local': 'django.core.files.storage.FileSystemStorage',
+    'memory': 'django.core.files.storage.InMemoryStorage',
+}
+DEFAULT_FILE_STORAGE = MEDIA_STORAGE_BACKENDS[MEDIA_STORAGE]
 
 GS_FILE_OVERWRITE = False
 
+# Uploads larger than FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to a temp file by Django and
+# sent to GCS as a resumable upload in chunks of this size (a multiple of 256 KB), so a
+# multi-GB video only ever holds one chunk in memory
+GS_BLOB_CHUNK_SIZE = 8 * 1024 * 1024
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB, Django's default
+
+# Responsive cover image variants (see core.media); 0 workers processes images inline
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+IMAGE_PROCESSING_WORKERS = 2
+
 GS_PROJECT_ID = os.getenv('GS_PROJECT_ID')
 GS_BUCKET_NAME = os.getenv('GS_BUCKET_NAME')
 GS_LOCATION = 'uploads'
-
-MEDIA_URL = f"https://storage.googleapis.com/{GS_BUCKET_NAME}/{GS_LOCATION}/"
-
-
-MEDIA_ROOT = "media/uploads/"
-UPLOAD_ROOT = 'media/uploads/'
-
-GOOGLE_CREDENTIALS_PATH = 'credentials/google-cloud-credentials.json'
-# Ensure GOOGLE_CREDENTIALS_PATH is properly loaded
-if GOOGLE_CREDENTIALS_PATH:
-    GS_CREDENTIALS = service_account.Credentials.from_service_account_file(
-        os.path.join(BASE_DIR, GOOGLE_CREDENTIALS_PATH)
-    )
+# Objects are readable through bucket-level access (uniform bucket-level access with
+# allUsers as object viewer), not per-object ACLs; turn on querystring auth for a
+# private bucket to serve signed URLs instead
+GS_DEFAULT_ACL = None
+GS_QUERYSTRING_AUTH = config('GS_QUERYSTRING_AUTH', default=False, cast=bool)
+
+# Service-account key, relative to BASE_DIR. Loaded on the first GCS call (see
+# game_reviews.gcloud), falling back to application default credentials when absent
+GOOGLE_CREDENTIALS_PATH = config('GOOGLE_CREDENTIALS_PATH', default='credentials/google-cloud-credentials.json')
+GS_CREDENTIALS = None
+
+if MEDIA_STORAGE == 'gcs':
+    MEDIA_URL = f"https://storage.googleapis.com/{GS_BUCKET_NAME}/{GS_LOCATION}/"
 else:
-    raise ValueError("GOOGLE_CREDENTIALS_PATH environment variable is not set.")
+    MEDIA_URL = '/media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
 
 # Default Primary Key Field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,54 @@
+"""
+Production profile, used by the Docker image and gunicorn.conf.py:
+DJANGO_SETTINGS_MODULE=game_reviews.settings_production.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import MIDDLEWARE, Csv, config
+
+DEBUG = False
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='127.0.0.1,localhost', cast=Csv())
+
+# Server-Timing headers expose view internals to every client; opt in when profiling
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=False, cast=bool)
+
+# gunicorn runs several worker processes, which must share one cache: the cache versions
+# bumped by core.signals, the SteamSpy rate limiter and circuit breaker and the cached
+# sessions all live there, and a per-process cache would only update the worker that
+# handled the write
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache'),
+        'LOCATION': config('CACHE_LOCATION', default='redis://redis:6379/0'),
+    }
+}
+if CACHES['default']['BACKEND'] in ('django.core.cache.backends.locmem.LocMemCache',
+                                    'django.core.cache.backends.dummy.DummyCache'):
+    raise ImproperlyConfigured(
+        "Production needs a cache shared by all workers (Redis or Memcached), "
+        f"not {CACHES['default']['BACKEND']}; set CACHE_BACKEND and CACHE_LOCATION."
+    )
+
+# WhiteNoise serves the collectstatic output straight from the app server: hashed file
+# names cached for a year, with gzip and brotli copies compressed at build time
+MIDDLEWARE = [*MIDDLEWARE]
+MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                  'whitenoise.middleware.WhiteNoiseMiddleware')
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# The session is read on every request; serve it from the cache, written through to the DB
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
@@ -5,3 +7,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('core.urls')),
 ]
+
+if settings.MEDIA_STORAGE == 'local':
+    # Development only: static() adds nothing unless DEBUG is on
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
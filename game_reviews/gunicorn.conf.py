@@ -0,0 +1,29 @@
+# gunicorn settings, read from the working directory: `gunicorn` is all it takes
+import multiprocessing
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'game_reviews.settings_production')
+
+wsgi_app = 'game_reviews.wsgi:application'
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Threaded workers, (2 x cores) + 1 processes by default. Threads live as long as their
+# worker, so each keeps its database connection between requests (CONN_MAX_AGE); keep
+# workers x threads under the database's max_connections. Workers don't share memory,
+# so the production settings refuse to start without a shared cache (Redis/Memcached)
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Load the app once before forking, so workers share its memory
+preload_app = True
+# Recycle workers now and then to bound memory growth
+max_requests = 2000
+max_requests_jitter = 200
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'